@@ -0,0 +1,72 @@
+import argparse
+import multiprocessing as mp
+import time
+
+from core.database import db
+from core.logger import logger
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Standalone analysis workers draining social_posts (process_status=0) via leases"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    parser.add_argument("--task-id", default=None, help="Only process posts of this crawler task")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep polling for new posts instead of exiting once the backlog is drained",
+    )
+    parser.add_argument("--idle-sleep", type=float, default=10.0, help="Seconds between polls with --follow")
+    return parser.parse_args(argv)
+
+
+def run_worker(index: int, args: argparse.Namespace) -> None:
+    # Each process opens its own MongoClient; clients must not be shared across processes.
+    from modules.analysis.lease import default_worker_id
+    from modules.analysis.manager import AnalysisManager
+
+    db.connect()
+    worker_id = f"{default_worker_id()}#{index}"
+    manager = AnalysisManager()
+    logger.info(f"[AnalysisWorker] {worker_id} started")
+
+    while True:
+        manager.process_raw_posts(task_id=args.task_id, batch_size=args.batch_size, worker_id=worker_id)
+        if not args.follow:
+            break
+        time.sleep(args.idle_sleep)
+
+    logger.info(f"[AnalysisWorker] {worker_id} finished")
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.workers <= 1:
+        run_worker(0, args)
+        return
+
+    # spawn: the parent holds no Mongo connection or model, children start clean on every platform.
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=run_worker, args=(i, args), name=f"analysis-{i}") for i in range(args.workers)]
+    for p in procs:
+        p.start()
+    logger.info(f"[AnalysisWorker] Started {len(procs)} workers")
+
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        logger.info("[AnalysisWorker] Stopped by keyboard interrupt")
+        for p in procs:
+            p.terminate()
+            p.join()
+
+    failed = [p.name for p in procs if p.exitcode]
+    if failed:
+        logger.error(f"[AnalysisWorker] Workers exited with errors: {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,72 @@ class Settings:
 
     # NLP Model
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "shibing624/text2vec-base-chinese")
+    # 批量编码时每次送入模型的句子数
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    # 候选词 / 文档向量 LRU 缓存的内存上限 (MB)，0 表示关闭
+    EMBEDDING_CACHE_MB = float(os.getenv("EMBEDDING_CACHE_MB", "256"))
+    # 每条帖子送去编码的候选关键词上限，0 表示不裁剪
+    KEYWORD_MAX_CANDIDATES = int(os.getenv("KEYWORD_MAX_CANDIDATES", "64"))
+    # 情感分析每次送入 pipeline 的条数，以及按 token 截断的最大长度
+    SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+    SENTIMENT_MAX_TOKENS = int(os.getenv("SENTIMENT_MAX_TOKENS", "512"))
+    # 第一阶段分析的进程数 (1 为单进程，0 为按 CPU 核数)
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+    # 多个分析 worker 共同消费积压时，每批帖子的租约时长 (秒)，超时未写回的帖子会被其他 worker 重新领取
+    ANALYSIS_LEASE_SECONDS = int(os.getenv("ANALYSIS_LEASE_SECONDS", "600"))
+    # 分析流水线 (领取 / 清洗 / 推理 / 写回) 各阶段之间缓冲的最大批数
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+    # NLP 结果持久化缓存 (按清洗后文本 + 模型版本哈希)，TTL 天数为 0 表示永不过期；
+    # 修改词表等影响结果的配置后可通过 NLP_RESULT_CACHE_VERSION 手动让旧缓存失效
+    NLP_RESULT_CACHE = os.getenv("NLP_RESULT_CACHE", "true").strip().lower() in {"1", "true", "yes"}
+    NLP_RESULT_CACHE_TTL_DAYS = float(os.getenv("NLP_RESULT_CACHE_TTL_DAYS", "30"))
+    NLP_RESULT_CACHE_VERSION = os.getenv("NLP_RESULT_CACHE_VERSION", "1")
+    # 近似重复折叠 (SimHash)：海明距离阈值、参与去重的最短文本长度、索引保留的代表帖数；
+    # 每轮开始时从库里载入最近 NEAR_DUP_WINDOW_HOURS 小时的代表帖指纹，跨批次 / 跨任务的转发同样会被折叠 (0 表示只在本轮内去重)
+    NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").strip().lower() in {"1", "true", "yes"}
+    NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+    NEAR_DUP_MIN_LENGTH = int(os.getenv("NEAR_DUP_MIN_LENGTH", "10"))
+    NEAR_DUP_INDEX_SIZE = int(os.getenv("NEAR_DUP_INDEX_SIZE", "200000"))
+    NEAR_DUP_WINDOW_HOURS = int(os.getenv("NEAR_DUP_WINDOW_HOURS", "24"))
+    # 推理后端：torch (默认) 或 onnx (CPU 推理，需先执行 scripts/onnx_backend.py export)
+    NLP_BACKEND = os.getenv("NLP_BACKEND", "torch").strip().lower()
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "")
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").strip().lower() in {"1", "true", "yes"}
+    ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+    # 事件词 / 负面词词表文件 (默认 modules/analysis/triggers.txt) 及热加载检查间隔 (秒)
+    TRIGGER_LEXICON_PATH = os.getenv("TRIGGER_LEXICON_PATH", "")
+    TRIGGER_RELOAD_INTERVAL = float(os.getenv("TRIGGER_RELOAD_INTERVAL", "30"))
+    # 话题聚类方式：keyword (按首个关键词分组)、embedding (按向量阈值聚类，全量重建)
+    # 或 incremental (新帖分配到已持久化的话题中心，只更新受影响的话题)
+    CLUSTER_MODE = os.getenv("CLUSTER_MODE", "keyword").strip().lower()
+    # embedding 模式：归一化向量的余弦相似度阈值、话题数上限、额外的重分配 (k-means) 轮数、每块向量数
+    CLUSTER_SIM_THRESHOLD = float(os.getenv("CLUSTER_SIM_THRESHOLD", "0.75"))
+    CLUSTER_MAX_TOPICS = int(os.getenv("CLUSTER_MAX_TOPICS", "2000"))
+    CLUSTER_REFINE_ITERS = int(os.getenv("CLUSTER_REFINE_ITERS", "1"))
+    CLUSTER_BLOCK_SIZE = int(os.getenv("CLUSTER_BLOCK_SIZE", "4096"))
+    # incremental 模式：清理空话题 / 合并相近话题的间隔 (小时)
+    CLUSTER_COMPACT_INTERVAL_HOURS = float(os.getenv("CLUSTER_COMPACT_INTERVAL_HOURS", "24"))
+    # keyword / embedding 模式的话题统计方式：python (逐帖拉回 Python 累加)
+    # 或 mongo (先给帖子写入 topic_key，再用聚合管道在库内汇总，需 MongoDB 5.2+)
+    CLUSTER_STATS_BACKEND = os.getenv("CLUSTER_STATS_BACKEND", "python").strip().lower()
+    # 话题分布图 (/graph) 布局：话题数不超过 LAYOUT_REFINE_MAX_TOPICS 时在 PCA 投影上再做
+    # LAYOUT_REFINE_ITERS 轮应力优化 (0 为关闭)；incremental 模式下变动话题占比超过
+    # LAYOUT_REFIT_RATIO 时重新拟合投影，否则只按已保存的投影基更新变动话题的坐标
+    LAYOUT_REFINE_MAX_TOPICS = int(os.getenv("LAYOUT_REFINE_MAX_TOPICS", "500"))
+    LAYOUT_REFINE_ITERS = int(os.getenv("LAYOUT_REFINE_ITERS", "30"))
+    LAYOUT_REFIT_RATIO = float(os.getenv("LAYOUT_REFIT_RATIO", "0.2"))
+    # 关联话题 (图谱边)：每个话题保留的最相似话题数及最低相似度；话题数达到 RELATED_ANN_MIN_TOPICS
+    # 且装有 faiss / hnswlib 时用近似最近邻索引，否则分块精确计算 (每块相似度矩阵不超过 RELATED_BLOCK_MB)
+    RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "8"))
+    RELATED_MIN_SIMILARITY = float(os.getenv("RELATED_MIN_SIMILARITY", "0.3"))
+    RELATED_ANN_MIN_TOPICS = int(os.getenv("RELATED_ANN_MIN_TOPICS", "20000"))
+    RELATED_BLOCK_MB = float(os.getenv("RELATED_BLOCK_MB", "64"))
+    # 突发检测：按话题维护小时热度的 EWMA 均值/方差 (平滑系数 BURST_ALPHA)，当前小时热度的 z 分数
+    # 不低于 BURST_Z_THRESHOLD、帖子数不少于 BURST_MIN_POSTS 且该小时在最近 BURST_WINDOW_HOURS 小时内即为突发
+    BURST_ALPHA = float(os.getenv("BURST_ALPHA", "0.3"))
+    BURST_Z_THRESHOLD = float(os.getenv("BURST_Z_THRESHOLD", "3.0"))
+    BURST_MIN_POSTS = int(os.getenv("BURST_MIN_POSTS", "5"))
+    BURST_WINDOW_HOURS = int(os.getenv("BURST_WINDOW_HOURS", "2"))
 
     # Proxy
     PROXY_URL = os.getenv("PROXY_URL", "")
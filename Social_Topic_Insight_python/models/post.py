@@ -19,7 +19,7 @@ class SocialPost(MongoModel):
     ip_location: Optional[str] = None
 
     # --- 2. AI 分析回填数据 (Optional, 初始为 None) ---
-    process_status: int = 0  # 0:未处理, 1:已完成, -1:失败
+    process_status: int = 0  # 0:未处理, 1:已完成, -1:失败, 2:已被分析 worker 领取 (见 lease_owner / lease_expires)
     
     clean_content: Optional[str] = None
     sentiment_score: Optional[float] = None
@@ -28,8 +28,19 @@ class SocialPost(MongoModel):
     # 向量数据 (通常不直接展示给前端，但库里要有)
     embedding: Optional[List[float]] = None
     
+    # 近似重复帖指向的代表帖 _id (NLP 结果复用代表帖的，热度仍单独计入话题)
+    duplicate_of: Optional[PyObjectId] = None
+    # 清洗后文本的 64 位 SimHash 指纹 (补码存为 int64)，下一轮去重时载入最近的代表帖
+    simhash: Optional[int] = None
+
     # 外键：指向 Topic 表
     topic_ref_id: Optional[PyObjectId] = None
+    # 聚合统计模式 (CLUSTER_STATS_BACKEND=mongo) 下该帖所属的话题分组键
+    topic_key: Optional[str] = None
+    # 增量聚类 (CLUSTER_MODE=incremental)：待聚类标记，以及该帖计入所属话题的贡献
+    # (话题、热度、情感、时间桶、关键词、地域)，重新分析时据此扣除旧值
+    cluster_pending: bool = False
+    cluster_contrib: Optional[Dict[str, Any]] = None
 
     class Config:
         # 指定 MongoDB 集合名称 (仅作记录，实际在 DB层调用)
@@ -16,6 +16,7 @@ class AnalyzedTopic(MongoModel):
     first_occur_time: datetime
     last_active_time: datetime
     is_burst: bool = False           # 是否突发
+    burst_score: float = 0.0         # 突发分数：当前小时热度相对 EWMA 基线的 z 分数
     
     rank_change: int = 0             # 排名变化
     
@@ -1,4 +1,5 @@
 from typing import Optional
+from datetime import datetime
 from pydantic import Field
 from .base import MongoModel, PyObjectId
 
@@ -15,4 +16,22 @@ class TopicTrend(MongoModel):
     representative_post: Optional[str] = None # 存 post_id
 
     class Config:
-        collection_name = "topic_trends"
\ No newline at end of file
+        collection_name = "topic_trends"
+
+# 多粒度趋势汇总 (minute / hour / day)，按 (topic_ref_id, granularity, bucket_start) 唯一，
+# 增量聚类时用 $inc 累加；topic_trends 仍保留小时粒度的字符串桶供 Java 服务读取
+class TopicTrendRollup(MongoModel):
+    # 外键
+    topic_ref_id: PyObjectId
+
+    granularity: str                 # "minute" / "hour" / "day"
+    bucket_start: datetime           # 时间桶起点
+
+    heat_value: int
+    post_count: int
+    # 情感按和与计数存储，平均值 = sent_sum / sent_count
+    sent_sum: float = 0.0
+    sent_count: int = 0
+
+    class Config:
+        collection_name = "topic_trend_rollups"
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from math import sqrt
+
+from core.config import settings
+
+# Empty hours folded into the baseline at most; after this the EWMA has decayed to ~0 anyway.
+MAX_GAP_HOURS = 72
+HOUR = timedelta(hours=1)
+
+
+class BurstState:
+    """
+    Online burst detector for one topic's hourly heat.
+
+    Closed hours feed an exponentially weighted mean / variance (alpha = BURST_ALPHA; empty
+    hours count as zero heat). The open (latest) hour is scored against that baseline:
+    z = (heat - mean) / sqrt(var + mean + 1), where the `mean + 1` term is a Poisson-style
+    floor so a flat or brand-new topic does not divide by ~0. Advancing to a new hour costs
+    O(1) (empty gaps are capped at MAX_GAP_HOURS), so it can run on every incremental batch.
+    Updates for hours older than the open one are history and leave the baseline alone.
+    """
+
+    __slots__ = ("mean", "var", "bucket", "level", "count")
+
+    def __init__(self, mean=0.0, var=0.0, bucket=None, level=0, count=0):
+        self.mean = mean
+        self.var = var
+        self.bucket = bucket
+        self.level = level
+        self.count = count
+
+    @classmethod
+    def from_doc(cls, doc) -> "BurstState":
+        doc = doc or {}
+        return cls(doc.get("mean", 0.0), doc.get("var", 0.0), doc.get("bucket"), doc.get("level", 0), doc.get("count", 0))
+
+    def to_doc(self) -> dict:
+        return {"mean": self.mean, "var": self.var, "bucket": self.bucket, "level": self.level, "count": self.count}
+
+    def _observe(self, x: float):
+        alpha = settings.BURST_ALPHA
+        diff = x - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1 - alpha) * (self.var + diff * incr)
+
+    def advance(self, bucket: datetime, heat: int, count: int):
+        """Set the current totals of an hourly bucket (hour-aligned datetime)."""
+        if self.bucket is not None and bucket < self.bucket:
+            return
+        if self.bucket is not None and bucket > self.bucket:
+            self._observe(self.level)
+            gap = int((bucket - self.bucket) / HOUR) - 1
+            for _ in range(min(gap, MAX_GAP_HOURS)):
+                self._observe(0.0)
+        self.bucket, self.level, self.count = bucket, heat, count
+
+    def score(self) -> float:
+        return round((self.level - self.mean) / sqrt(max(self.var, 0.0) + self.mean + 1.0), 4)
+
+    def is_burst(self, now: datetime) -> bool:
+        return (
+            self.bucket is not None
+            and self.bucket >= bucket_of(now) - timedelta(hours=settings.BURST_WINDOW_HOURS - 1)
+            and self.count >= settings.BURST_MIN_POSTS
+            and self.score() >= settings.BURST_Z_THRESHOLD
+        )
+
+    def topic_fields(self, now: datetime) -> dict:
+        return {"is_burst": self.is_burst(now), "burst_score": self.score(), "burst_state": self.to_doc()}
+
+
+def bucket_of(t: datetime) -> datetime:
+    return t.replace(minute=0, second=0, microsecond=0)
+
+
+def replay(trend: dict) -> BurstState:
+    """Detector state after a topic's whole hourly series ({hour datetime: [heat, count, ...]})."""
+    state = BurstState()
+    for bucket in sorted(trend):
+        values = trend[bucket]
+        state.advance(bucket, values[0], values[1])
+    return state
+
+
+def expire_stale_bursts(topics, now: datetime):
+    """Clear is_burst on topics whose open hour fell out of the BURST_WINDOW_HOURS window."""
+    cutoff = bucket_of(now) - timedelta(hours=settings.BURST_WINDOW_HOURS - 1)
+    topics.update_many({"is_burst": True, "burst_state.bucket": {"$lt": cutoff}}, {"$set": {"is_burst": False}})
@@ -1,40 +1,61 @@
 import re
 
+# 正则全部在模块加载时编译一次
+# 至少含一个字母 / 汉字 (即不全是数字、空白、符号、下划线)
+_HAS_LETTER = re.compile(r'[^\d\s\W_]')
+_URL = re.compile(r'(https?|ftp)://[-A-Za-z0-9+&@#/%?=~_|!:,.;]+')
+_REPLY = re.compile(r'回复@.*?:')
+_MENTION = re.compile(r'@[\w\u4e00-\u9fa5]+')
+_HASHTAG = re.compile(r'#([^#]+)#')
+# 中文与英文数字的两种交界合并为一次扫描 (只在交界处插入空格，两种交界互不影响)
+_CJK_ALNUM_BOUNDARY = re.compile(
+    r'(?<=[\u4e00-\u9fa5])(?=[a-zA-Z0-9])|(?<=[a-zA-Z0-9])(?=[\u4e00-\u9fa5])'
+)
+_NOISE_WORDS = re.compile(r'(来源|视频|内容|全文|展开|查看|上热门|热门|vlog|日常|智搜)')
+
+
 class TextCleaner:
     @staticmethod
     def clean(text: str) -> str:
         if not text: return ""
 
-        if re.match(r'^[\d\s\W_]+$', text):
+        if not _HAS_LETTER.search(text):
             return ""
-        
+
         # 1. URL -> 替换为空格 (防止前后词粘连)
-        text = re.sub(r'(https?|ftp)://[-A-Za-z0-9+&@#/%?=~_|!:,.;]+', ' ', text)
-        
-        # 2. 处理 "回复@xxx:" -> 替换为空格
-        text = re.sub(r'回复@.*?:', ' ', text)
-        
-        # 3. 处理 @用户 -> 替换为空格 (重要！防止 "A@B C" 变成 "AC")
-        text = re.sub(r'@[\w\u4e00-\u9fa5]+', ' ', text)
-        
+        if '://' in text:
+            text = _URL.sub(' ', text)
+
+        if '@' in text:
+            # 2. 处理 "回复@xxx:" -> 替换为空格
+            if '回复@' in text:
+                text = _REPLY.sub(' ', text)
+            # 3. 处理 @用户 -> 替换为空格 (重要！防止 "A@B C" 变成 "AC")
+            text = _MENTION.sub(' ', text)
+
         # 4. 处理话题 #话题# -> 替换为 " 话题 " (前后加空格，突出话题)
-        text = re.sub(r'#([^#]+)#', r' \1 ', text)
-        
+        if '#' in text:
+            text = _HASHTAG.sub(r' \1 ', text)
+
         # 5. 中英文/数字之间加空格 (解决 CCTV1非遗 -> CCTV1 非遗)
-        # 模式：[中文][英文数字] -> [中文] [英文数字]
-        text = re.sub(r'([\u4e00-\u9fa5])([a-zA-Z0-9])', r'\1 \2', text)
-        # 模式：[英文数字][中文] -> [英文数字] [中文]
-        text = re.sub(r'([a-zA-Z0-9])([\u4e00-\u9fa5])', r'\1 \2', text)
+        text = _CJK_ALNUM_BOUNDARY.sub(' ', text)
 
-        text = re.sub(r'(来源|视频|内容|全文|展开|查看|上热门|热门|vlog|日常|智搜)', '', text)
+        text = _NOISE_WORDS.sub('', text)
 
-        # 6. 合并多余空格
-        text = re.sub(r'\s+', ' ', text)
+        # 6. 合并多余空格并去掉首尾空白 (str.split 与 \s 使用同一套空白字符定义)
+        text = ' '.join(text.split())
 
         if text.count('#') > 6:
             return ""
 
-        if len(text.strip()) < 4:
+        if len(text) < 4:
             return ""
-        
-        return text.strip()
\ No newline at end of file
+
+        return text
+
+    @staticmethod
+    def clean_many(texts):
+        """逐条清洗的生成器，适合大批量 / 回填场景"""
+        clean = TextCleaner.clean
+        for text in texts:
+            yield clean(text)
@@ -1,15 +1,218 @@
+import sys
+import time
+from array import array
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime
 from math import sqrt
 from typing import Any, Dict, List
 
-from pymongo import UpdateOne
+import numpy as np
+from bson import ObjectId
 
+from core.config import settings
 from core.database import db
 from core.logger import logger
 from models.topic import AnalyzedTopic
 from models.trend import TopicTrend
-from .nlp_base import NLPProcessor
+from .burst import replay
+from .embedding_cluster import StreamingClusterer, normalize_rows
+from .executor import AnalysisExecutor
+from .layout import TopicLayout, keyword_vectors
+from .related import related_topics
+from .rollups import ROLLUP_COLLECTION, ROLLUP_INDEXES, accumulator_rollups
+from .snapshot import CollectionSnapshot
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REP_DOC_LIMIT = 8
+# Indexes rebuilt on every snapshot (renaming over the live collection replaces its indexes).
+TOPIC_INDEXES = [
+    ([("total_heat", -1)], {}),
+    ([("task_id", 1), ("total_heat", -1)], {}),
+    ([("is_burst", 1), ("burst_score", -1)], {}),
+]
+TREND_INDEXES = [
+    ([("topic_ref_id", 1), ("time_bucket", 1)], {}),
+]
+# Persisted per-topic centroids and running aggregates for CLUSTER_MODE=incremental.
+TOPIC_STATE_COLLECTION = "topic_centroids"
+BACKFILL_CHUNK = 10000
+TREND_INSERT_CHUNK = 5000
+
+# Only the fields the accumulators read; content is not needed since processed posts carry clean_content.
+POST_PROJECTION = {
+    "clean_content": 1,
+    "keywords": 1,
+    "sentiment_score": 1,
+    "publish_time": 1,
+    "crawl_time": 1,
+    "metrics": 1,
+    "ip_location": 1,
+    "post_id": 1,
+    "duplicate_of": 1,
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where `resource` is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class TopicAccumulator:
+    """
+    Compact per-topic running aggregates.
+    Post ids are packed as 12-byte ObjectId binaries; only the first REP_DOC_LIMIT texts are kept.
+    emb_sum / emb_count give the embedding centroid of keyword-grouped topics (posts read with an
+    `embedding` field only).
+    """
+
+    __slots__ = (
+        "post_ids", "post_count", "keywords", "rep_docs", "heat", "sent_sum", "sent_count",
+        "min_time", "max_time", "geo", "trend", "minutes", "emb_sum", "emb_count",
+    )
+
+    def __init__(self):
+        self.post_ids = bytearray()
+        self.post_count = 0
+        self.keywords = defaultdict(int)
+        self.rep_docs = []
+        self.heat = 0
+        self.sent_sum = 0.0
+        self.sent_count = 0
+        self.min_time = None
+        self.max_time = None
+        self.geo = defaultdict(int)
+        # hour bucket (datetime) -> [heat, count, sent_sum, sent_count, rep_post]
+        self.trend = {}
+        # minute bucket (datetime) -> [heat, count, sent_sum, sent_count], for topic_trend_rollups
+        self.minutes = {}
+        self.emb_sum = None
+        self.emb_count = 0
+
+    def add_embedding(self, embedding):
+        # Embeddings of another dimension (model switched mid-history) are skipped.
+        if not embedding:
+            return
+        if self.emb_sum is None:
+            self.emb_sum = np.zeros(len(embedding), np.float32)
+        elif len(embedding) != len(self.emb_sum):
+            return
+        self.emb_sum += np.asarray(embedding, dtype=np.float32)
+        self.emb_count += 1
+
+    def add(self, post: Dict[str, Any], heat: int, publish_time: datetime):
+        post_id = post["_id"]
+        if isinstance(post_id, ObjectId):
+            self.post_ids += post_id.binary
+        self.post_count += 1
+        self.heat += heat
+
+        # Near-duplicates still add heat but never become representative docs.
+        if len(self.rep_docs) < REP_DOC_LIMIT and not post.get("duplicate_of"):
+            text = (post.get("clean_content") or "").strip()
+            if text:
+                self.rep_docs.append(text[:200])
+
+        for kw in (post.get("keywords") or []):
+            if isinstance(kw, str) and kw.strip():
+                self.keywords[kw.strip()] += 1
+
+        sent = post.get("sentiment_score")
+        if sent is not None:
+            self.sent_sum += float(sent)
+            self.sent_count += 1
+
+        if self.min_time is None or publish_time < self.min_time:
+            self.min_time = publish_time
+        if self.max_time is None or publish_time > self.max_time:
+            self.max_time = publish_time
+
+        location = post.get("ip_location")
+        if location:
+            self.geo[str(location)] += 1
+
+        self.add_embedding(post.get("embedding"))
+
+        bucket = publish_time.replace(minute=0, second=0, microsecond=0)
+        t = self.trend.get(bucket)
+        if t is None:
+            t = self.trend[bucket] = [0, 0, 0.0, 0, None]
+        t[0] += heat
+        t[1] += 1
+        if sent is not None:
+            t[2] += float(sent)
+            t[3] += 1
+        t[4] = post.get("post_id")
+
+        minute = publish_time.replace(second=0, microsecond=0)
+        m = self.minutes.get(minute)
+        if m is None:
+            m = self.minutes[minute] = [0, 0, 0.0, 0]
+        m[0] += heat
+        m[1] += 1
+        if sent is not None:
+            m[2] += float(sent)
+            m[3] += 1
+
+    def iter_post_ids(self, chunk: int):
+        ids = self.post_ids
+        step = chunk * 12
+        for start in range(0, len(ids), step):
+            yield [ObjectId(bytes(ids[i:i + 12])) for i in range(start, min(start + step, len(ids)), 12)]
+
+
+class PostLabelIndex:
+    """
+    Cluster label per post, with post ids packed in ascending _id order (12 bytes each).
+    Built from an _id-sorted cursor so later _id-sorted passes can merge-join via seek().
+    """
+
+    def __init__(self):
+        self.ids = bytearray()
+        self.labels = array("i")
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _key(self, i: int) -> bytes:
+        return bytes(self.ids[i * 12:(i + 1) * 12])
+
+    def append(self, binary: bytes, label: int = -1) -> int:
+        self.ids += binary
+        self.labels.append(label)
+        return len(self.labels) - 1
+
+    def find(self, binary: bytes) -> int:
+        """Position of an id via binary search, or -1."""
+        lo, hi = 0, len(self.labels)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < binary:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.labels) and self._key(lo) == binary else -1
+
+    def rewind(self):
+        self._cursor = 0
+
+    def seek(self, binary: bytes) -> int:
+        """Position of an id; ids must be sought in ascending order between rewinds."""
+        n = len(self.labels)
+        while self._cursor < n and self._key(self._cursor) < binary:
+            self._cursor += 1
+        return self._cursor if self._cursor < n and self._key(self._cursor) == binary else -1
+
+    def label_array(self) -> np.ndarray:
+        return np.frombuffer(self.labels, dtype=np.int32)
 
 
 class ClusterEngine:
@@ -20,9 +223,6 @@ class ClusterEngine:
     - topic_trends: hourly trend buckets
     """
 
-    def __init__(self):
-        self.nlp = NLPProcessor()
-
     @staticmethod
     def _safe_publish_time(post: Dict[str, Any]) -> datetime:
         crawl_time = post.get("crawl_time")
@@ -43,198 +243,321 @@ class ClusterEngine:
         return max(score, 1)
 
     @staticmethod
-    def _topic_coords(topic_key: str) -> List[float]:
-        seed_a = hash(topic_key)
-        seed_b = hash(topic_key[::-1])
-        x = ((seed_a % 2000) - 1000) / 100.0
-        y = ((seed_b % 2000) - 1000) / 100.0
-        return [x, y]
+    def _topic_vectors(sorted_groups, centroids=None):
+        """
+        Normalised vectors behind the topic map and related-topic edges: embedding centroids for
+        `cluster-<label>` topics when given, otherwise the mean post embedding of each keyword topic.
+        Hashed keyword profiles are the fallback when no post carries an embedding.
+        Returns (space, keys, vectors); topics without a vector are left out.
+        """
+        if centroids is None:
+            embedded = [(key, data) for key, data in sorted_groups if data.emb_count]
+            if not embedded:
+                keys = [key for key, _ in sorted_groups]
+                return "keywords", keys, keyword_vectors([data.keywords for _, data in sorted_groups])
+            dim = len(embedded[0][1].emb_sum)
+            embedded = [(key, data) for key, data in embedded if len(data.emb_sum) == dim]
+            vectors = normalize_rows(np.stack([data.emb_sum for _, data in embedded]))
+            return "embedding", [key for key, _ in embedded], vectors
+        labels = {f"cluster-{label}": label for label in range(len(centroids))}
+        keys = [key for key, _ in sorted_groups if key in labels]
+        return "embedding", keys, centroids[[labels[key] for key in keys]]
+
+    @staticmethod
+    def _topic_coords(space: str, keys: List[str], vectors: np.ndarray) -> Dict[str, List[float]]:
+        """Map positions per topic key (see TopicLayout); missing keys belong at the origin."""
+        if not keys:
+            return {}
+        t0 = time.perf_counter()
+        layout = TopicLayout.load(space)
+        coords = layout.fit(vectors)
+        layout.save()
+        logger.info(f"Topic layout ({space}): topics={len(keys)}, {time.perf_counter() - t0:.2f}s")
+        return {key: [float(x), float(y)] for key, (x, y) in zip(keys, coords)}
 
     def _topic_key_from_post(self, post: Dict[str, Any]) -> str:
         keywords = post.get("keywords") or []
         if keywords:
             return str(keywords[0])
 
-        text = post.get("clean_content") or post.get("content") or ""
-        inferred = self.nlp.get_keywords(text) if text else []
+        # Processed posts always carry clean_content (shorter than 4 chars is rejected before analysis).
+        text = post.get("clean_content") or ""
+        # Inference goes through the shared executor so the (possibly forking) parent never runs a model.
+        inferred = AnalysisExecutor.shared().keywords_batch([text])[0] if text else []
         return inferred[0] if inferred else "其他话题"
 
+    @staticmethod
+    def _sorted_cursor(collection, query_filter, projection):
+        # The _id hint keeps the sort index-backed instead of an in-memory sort over the whole backlog.
+        return (
+            collection.find(query_filter, projection)
+            .sort("_id", 1)
+            .hint([("_id", 1)])
+            .batch_size(2000)
+        )
+
+    def _stream_embedding_blocks(self, collection, query_filter, index, dups=None, aside=frozenset()):
+        """
+        Yield (positions, matrix) blocks of normalised float32 embeddings in _id order.
+        With dups given (first pass) posts are appended to index and near-duplicates whose
+        canonical post is already indexed are set aside instead of clustered; duplicates of a
+        post outside the query are clustered on their own embedding (the canonical's).
+        Otherwise rows are merge-joined onto index, skipping the positions in aside.
+        """
+        block_size = settings.CLUSTER_BLOCK_SIZE
+        dim = None
+        positions, rows = [], []
+        if dups is None:
+            index.rewind()
+
+        cursor = self._sorted_cursor(collection, query_filter, {"embedding": 1, "duplicate_of": 1})
+        for post in cursor:
+            binary = post["_id"].binary
+            if dups is not None:
+                pos = index.append(binary)
+                canonical = post.get("duplicate_of")
+                if canonical:
+                    canonical = ObjectId(canonical).binary
+                    if index.find(canonical) >= 0:
+                        dups.append((pos, canonical))
+                        continue
+            else:
+                pos = index.seek(binary)
+                if pos < 0 or pos in aside:
+                    continue
+
+            embedding = post.get("embedding")
+            if not embedding:
+                continue
+            dim = dim or len(embedding)
+            if len(embedding) != dim:
+                continue
+            positions.append(pos)
+            rows.append(embedding)
+            if len(rows) >= block_size:
+                yield positions, normalize_rows(np.asarray(rows, dtype=np.float32))
+                positions, rows = [], []
+
+        if rows:
+            yield positions, normalize_rows(np.asarray(rows, dtype=np.float32))
+
+    @staticmethod
+    def _remap_labels(index: PostLabelIndex, remap: np.ndarray):
+        labels = index.label_array()
+        assigned = labels >= 0
+        labels[assigned] = remap[labels[assigned]]
+
+    def _embedding_labels(self, collection, query_filter):
+        """
+        Pass 1 of embedding mode: stream embeddings and cluster them block by block,
+        merge near-identical clusters, then run CLUSTER_REFINE_ITERS reassignment passes. Near-duplicates take their
+        canonical post's label, or are clustered like any other post when the canonical is not part of the query.
+        Posts without a usable embedding keep label -1.
+        Returns the PostLabelIndex and the final centroids (row = label).
+        """
+        t0 = time.perf_counter()
+        clusterer = StreamingClusterer()
+        index = PostLabelIndex()
+        dups = []
+
+        for positions, X in self._stream_embedding_blocks(collection, query_filter, index, dups):
+            for pos, label in zip(positions, clusterer.partial_fit(X)):
+                index.labels[pos] = int(label)
+        logger.info(f"Embedding clustering pass: posts={len(index)}, clusters={clusterer.n_clusters}, "
+                    f"{time.perf_counter() - t0:.2f}s")
+        self._remap_labels(index, clusterer.merge())
+        logger.info(f"Embedding clustering merge: clusters={clusterer.n_clusters}")
+
+        aside = {pos for pos, _ in dups}
+        for _ in range(max(settings.CLUSTER_REFINE_ITERS, 0)):
+            if not clusterer.n_clusters:
+                break
+            clusterer.refine_begin()
+            for positions, X in self._stream_embedding_blocks(collection, query_filter, index, aside=aside):
+                for pos, label in zip(positions, clusterer.refine_partial(X)):
+                    index.labels[pos] = int(label)
+            self._remap_labels(index, clusterer.refine_end())
+            logger.info(f"Embedding clustering refine: clusters={clusterer.n_clusters}, "
+                        f"{time.perf_counter() - t0:.2f}s")
+
+        for pos, canonical in dups:
+            canonical_pos = index.find(canonical)
+            if canonical_pos >= 0:
+                index.labels[pos] = index.labels[canonical_pos]
+        return index, clusterer.centroids
+
+    def _accumulate(self, cursor, key_fn=None):
+        """Stream posts from the cursor into one TopicAccumulator per topic key."""
+        key_fn = key_fn or self._topic_key_from_post
+        groups = defaultdict(TopicAccumulator)
+        total = 0
+        for post in cursor:
+            publish_time = self._safe_publish_time(post)
+            heat = self._calc_heat(post.get("metrics") or {})
+            groups[key_fn(post)].add(post, heat, publish_time)
+            total += 1
+        return groups, total
+
     def run_clustering(self, task_id=None):
         logger.info("Start topic clustering...")
 
+        if settings.CLUSTER_MODE == "incremental":
+            # Imported here because the incremental engine builds on this module.
+            from .incremental import IncrementalClusterer
+            IncrementalClusterer(self).run(task_id=task_id)
+            return
+
         post_collection = db.get_collection("social_posts")
-        topic_collection = db.get_collection("analyzed_topics")
-        trend_collection = db.get_collection("topic_trends")
 
         query_filter = {"process_status": 1}
         if task_id:
             query_filter["task_id"] = str(task_id)
 
-        cursor = post_collection.find(
-            query_filter,
-            {
-                "content": 1,
-                "clean_content": 1,
-                "keywords": 1,
-                "sentiment_score": 1,
-                "publish_time": 1,
-                "crawl_time": 1,
-                "metrics": 1,
-                "ip_location": 1,
-                "post_id": 1,
-                "task_id": 1,
-            },
-        )
-        posts = list(cursor)
+        key_fn = self._topic_key_from_post
+        centroids = None
+        if settings.CLUSTER_MODE == "embedding":
+            index, centroids = self._embedding_labels(post_collection, query_filter)
+            index.rewind()
+
+            def key_fn(post):
+                pos = index.seek(post["_id"].binary)
+                label = index.labels[pos] if pos >= 0 else -1
+                # Posts without an embedding (or processed after pass 1) fall back to keyword grouping.
+                return f"cluster-{label}" if label >= 0 else self._topic_key_from_post(post)
 
-        if not posts:
+        now = datetime.now()
+        mongo_stats = None
+        if settings.CLUSTER_STATS_BACKEND == "mongo":
+            # Imported here because the aggregation path builds on this module.
+            from .topic_stats import KEY_PROJECTION, MongoTopicStats
+            mongo_stats = MongoTopicStats(post_collection)
+            # Keyword topics take their map / related-topic vectors from the post embeddings.
+            projection = KEY_PROJECTION if centroids is not None else dict(KEY_PROJECTION, embedding=1)
+            cursor = self._sorted_cursor(post_collection, query_filter, projection)
+            if mongo_stats.assign_keys(cursor, key_fn):
+                groups, total_posts = mongo_stats.collect(query_filter, now)
+            else:
+                groups, total_posts = {}, 0
+        elif settings.CLUSTER_MODE == "embedding":
+            cursor = self._sorted_cursor(post_collection, query_filter, POST_PROJECTION)
+            groups, total_posts = self._accumulate(cursor, key_fn)
+        else:
+            # _id order (not natural order) so keyword / geo ties resolve the same way as the mongo backend.
+            cursor = self._sorted_cursor(post_collection, query_filter, dict(POST_PROJECTION, embedding=1))
+            groups, total_posts = self._accumulate(cursor)
+
+        if not total_posts:
             logger.warning(f"No processed posts for clustering. task_id={task_id}")
             return
 
-        groups = defaultdict(
-            lambda: {
-                "posts": [],
-                "keywords": defaultdict(int),
-                "rep_docs": [],
-                "heat": 0,
-                "sent_sum": 0.0,
-                "sent_count": 0,
-                "min_time": None,
-                "max_time": None,
-                "geo": defaultdict(int),
-                "trend": defaultdict(lambda: {"heat": 0, "count": 0, "sent_sum": 0.0, "sent_count": 0, "rep_post": None}),
-            }
-        )
-
-        for post in posts:
-            topic_key = self._topic_key_from_post(post)
-            g = groups[topic_key]
-
-            text = (post.get("clean_content") or post.get("content") or "").strip()
-            publish_time = self._safe_publish_time(post)
-            metrics = post.get("metrics") or {}
-            heat = self._calc_heat(metrics)
-            sent = post.get("sentiment_score")
-
-            g["posts"].append(post)
-            g["heat"] += heat
-            if text:
-                g["rep_docs"].append(text[:200])
-
-            for kw in (post.get("keywords") or []):
-                if isinstance(kw, str) and kw.strip():
-                    g["keywords"][kw.strip()] += 1
-
-            if sent is not None:
-                g["sent_sum"] += float(sent)
-                g["sent_count"] += 1
-
-            if g["min_time"] is None or publish_time < g["min_time"]:
-                g["min_time"] = publish_time
-            if g["max_time"] is None or publish_time > g["max_time"]:
-                g["max_time"] = publish_time
-
-            location = post.get("ip_location")
-            if location:
-                g["geo"][str(location)] += 1
-
-            bucket = publish_time.strftime("%Y-%m-%d %H:00")
-            t = g["trend"][bucket]
-            t["heat"] += heat
-            t["count"] += 1
-            if sent is not None:
-                t["sent_sum"] += float(sent)
-                t["sent_count"] += 1
-            t["rep_post"] = post.get("post_id")
-
-        # Rebuild topic collections by latest clustering snapshot.
-        topic_collection.delete_many({})
-        trend_collection.delete_many({})
-
-        sorted_groups = sorted(groups.items(), key=lambda x: x[1]["heat"], reverse=True)
+        sorted_groups = sorted(groups.items(), key=lambda x: x[1].heat, reverse=True)
         top_50_keys = {name for name, _ in sorted_groups[:50]}
-
-        now = datetime.now()
-        yesterday = now - timedelta(days=1)
-
-        topic_id_map = {}
-        trend_docs = []
-
-        for topic_key, data in sorted_groups:
-            post_count = len(data["posts"])
-            if post_count == 0:
-                continue
-
-            keywords = [k for k, _ in sorted(data["keywords"].items(), key=lambda x: x[1], reverse=True)[:10]]
-            if not keywords:
-                keywords = [topic_key]
-
-            avg_sent = (data["sent_sum"] / data["sent_count"]) if data["sent_count"] else 0.0
-            first_time = data["min_time"] or now
-            last_time = data["max_time"] or now
-            is_burst = first_time > yesterday and post_count >= 5
-            coords = self._topic_coords(topic_key)
-
-            geo_distribution = [
-                {"name": k, "value": v}
-                for k, v in sorted(data["geo"].items(), key=lambda x: x[1], reverse=True)[:10]
-            ]
-
-            topic = AnalyzedTopic(
-                name="",
-                keywords=keywords,
-                total_heat=int(data["heat"]),
-                post_count=post_count,
-                avg_sentiment=round(avg_sent, 4),
-                first_occur_time=first_time,
-                last_active_time=last_time,
-                is_burst=is_burst,
-                geo_distribution=geo_distribution,
-            )
-
-            topic_doc = topic.model_dump(by_alias=True, exclude={"id"})
-            topic_doc["x"] = coords[0]
-            topic_doc["y"] = coords[1]
-            topic_doc["task_id"] = str(task_id) if task_id else None
-            topic_doc["rep_docs"] = data["rep_docs"][:8]
-            topic_doc["is_hot_top50"] = topic_key in top_50_keys
-
-            insert_result = topic_collection.insert_one(topic_doc)
-            topic_id_map[topic_key] = insert_result.inserted_id
-
-            for bucket, t in data["trend"].items():
-                avg_sent_bucket = (t["sent_sum"] / t["sent_count"]) if t["sent_count"] else 0.0
-                trend = TopicTrend(
-                    topic_ref_id=insert_result.inserted_id,
-                    time_bucket=bucket,
-                    heat_value=int(t["heat"]),
-                    post_count=int(t["count"]),
-                    sentiment_value=round(avg_sent_bucket, 4),
-                    representative_post=t["rep_post"],
+        space, vector_keys, vectors = self._topic_vectors(sorted_groups, centroids)
+        topic_coords = self._topic_coords(space, vector_keys, vectors)
+        # Ids are generated up front so trends and related-topic edges can reference topics before anything is inserted.
+        topic_ids = {key: ObjectId() for key, _ in sorted_groups}
+        neighbours = dict(zip(vector_keys, related_topics(vectors))) if vector_keys else {}
+
+        task_value = str(task_id) if task_id else None
+
+        # Build the new snapshot in staging collections; readers keep the previous one until the swap.
+        topic_snapshot = CollectionSnapshot("analyzed_topics", TOPIC_INDEXES)
+        trend_snapshot = CollectionSnapshot("topic_trends", TREND_INDEXES, chunk_size=TREND_INSERT_CHUNK)
+        rollup_snapshot = CollectionSnapshot(ROLLUP_COLLECTION, ROLLUP_INDEXES, chunk_size=TREND_INSERT_CHUNK)
+        published = []
+
+        try:
+            for topic_key, data in sorted_groups:
+                post_count = data.post_count
+                if post_count == 0:
+                    continue
+
+                keywords = [k for k, _ in sorted(data.keywords.items(), key=lambda x: x[1], reverse=True)[:10]]
+                if not keywords:
+                    keywords = [topic_key]
+
+                avg_sent = (data.sent_sum / data.sent_count) if data.sent_count else 0.0
+                first_time = data.min_time or now
+                last_time = data.max_time or now
+                burst = replay(data.trend)
+                coords = topic_coords.get(topic_key, [0.0, 0.0])
+
+                geo_distribution = [
+                    {"name": k, "value": v}
+                    for k, v in sorted(data.geo.items(), key=lambda x: x[1], reverse=True)[:10]
+                ]
+
+                topic = AnalyzedTopic(
+                    name="",
+                    keywords=keywords,
+                    total_heat=int(data.heat),
+                    post_count=post_count,
+                    avg_sentiment=round(avg_sent, 4),
+                    first_occur_time=first_time,
+                    last_active_time=last_time,
+                    is_burst=burst.is_burst(now),
+                    burst_score=burst.score(),
+                    geo_distribution=geo_distribution,
+                    related_topics=[
+                        {"topic_id": str(topic_ids[vector_keys[j]]), "similarity": sim}
+                        for j, sim in neighbours.get(topic_key, [])
+                    ],
                 )
-                trend_doc = trend.model_dump(by_alias=True, exclude={"id"})
-                trend_doc["topic_ref_id"] = insert_result.inserted_id
-                trend_doc["task_id"] = str(task_id) if task_id else None
-                trend_docs.append(trend_doc)
-
-        if trend_docs:
-            trend_collection.insert_many(trend_docs)
-
-        # Backfill social_posts.topic_ref_id
-        bulk_ops = []
-        for topic_key, data in sorted_groups:
-            topic_ref_id = topic_id_map.get(topic_key)
-            if topic_ref_id is None:
-                continue
-            for post in data["posts"]:
-                bulk_ops.append(
-                    UpdateOne(
-                        {"_id": post["_id"]},
-                        {"$set": {"topic_ref_id": topic_ref_id, "task_id": str(task_id) if task_id else None}}
+
+                topic_ref_id = topic_ids[topic_key]
+                topic_doc = topic.model_dump(by_alias=True, exclude={"id"})
+                topic_doc["_id"] = topic_ref_id
+                topic_doc["x"] = coords[0]
+                topic_doc["y"] = coords[1]
+                topic_doc["task_id"] = task_value
+                topic_doc["rep_docs"] = data.rep_docs
+                topic_doc["is_hot_top50"] = topic_key in top_50_keys
+                topic_doc["burst_state"] = burst.to_doc()
+                topic_snapshot.insert(topic_doc)
+                published.append((topic_ref_id, topic_key, data))
+
+                for bucket, (heat, count, sent_sum, sent_count, rep_post) in data.trend.items():
+                    avg_sent_bucket = (sent_sum / sent_count) if sent_count else 0.0
+                    trend = TopicTrend(
+                        topic_ref_id=topic_ref_id,
+                        time_bucket=bucket.strftime("%Y-%m-%d %H:00"),
+                        heat_value=int(heat),
+                        post_count=int(count),
+                        sentiment_value=round(avg_sent_bucket, 4),
+                        representative_post=rep_post,
                     )
+                    trend_doc = trend.model_dump(by_alias=True, exclude={"id"})
+                    trend_doc["topic_ref_id"] = topic_ref_id
+                    trend_doc["task_id"] = task_value
+                    trend_snapshot.insert(trend_doc)
+
+                for rollup_doc in accumulator_rollups(topic_ref_id, data, task_value):
+                    rollup_snapshot.insert(rollup_doc)
+
+            # Trends first: for the instant between the renames, old topics simply see new trends.
+            rollup_snapshot.publish()
+            trend_snapshot.publish()
+            topic_snapshot.publish()
+        except Exception:
+            topic_snapshot.discard()
+            trend_snapshot.discard()
+            rollup_snapshot.discard()
+            raise
+
+        # Incremental state no longer matches the snapshot; the next incremental run re-bootstraps.
+        db.get_collection(TOPIC_STATE_COLLECTION).delete_many({})
+
+        # Backfill social_posts.topic_ref_id; every post of a topic gets the same values.
+        if mongo_stats is not None:
+            mongo_stats.backfill(query_filter, [(ref_id, key) for ref_id, key, _ in published], task_value)
+        for topic_ref_id, _, data in published:
+            for ids in data.iter_post_ids(BACKFILL_CHUNK):
+                post_collection.update_many(
+                    {"_id": {"$in": ids}},
+                    {"$set": {"topic_ref_id": topic_ref_id, "task_id": task_value}},
                 )
+        topic_count = len(published)
 
-        if bulk_ops:
-            post_collection.bulk_write(bulk_ops)
-
-        logger.info(f"Clustering finished. topics={len(topic_id_map)}, posts={len(posts)}")
+        logger.info(
+            f"Clustering finished. topics={topic_count}, posts={total_posts}, peak_rss_mb={peak_rss_mb()}"
+        )
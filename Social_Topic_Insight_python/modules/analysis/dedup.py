@@ -0,0 +1,162 @@
+import hashlib
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.config import settings
+from core.logger import logger
+
+MASK64 = (1 << 64) - 1
+
+
+def simhash(text: str, ngram: int = 3) -> int:
+    """
+    64 位 SimHash：以去空白后的字符 n-gram 为特征、出现次数为权重。
+    仅有少量改动 (加个 emoji、改几个字) 的文本指纹只差少数几位。
+    """
+    text = "".join(text.split())
+    if not text: return 0
+    shingles = Counter(text[i:i + ngram] for i in range(max(len(text) - ngram + 1, 1)))
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    weights = np.fromiter(shingles.values(), dtype=np.float64, count=len(shingles))
+
+    # (n, 64) 的位矩阵，按权重投票决定每一位
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = (bits.T * 2.0 - 1.0) @ weights
+    packed = np.packbits(votes > 0, bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def to_int64(fp: int) -> int:
+    """Mongo 只有有符号 64 位整数，指纹按补码存储，读回时 & MASK64 还原"""
+    return fp - (1 << 64) if fp >= 1 << 63 else fp
+
+
+class NearDuplicateIndex:
+    """
+    SimHash + 分段 LSH 的近似重复索引。
+
+    指纹切成 max_distance + 1 段，海明距离不超过 max_distance 的两个指纹
+    必有一段完全相同 (抽屉原理)，因此只需比较同段桶里的候选。
+    索引只保存代表帖 (canonical)，超过 capacity 时淘汰最早加入的。
+    指纹随分析结果写回帖子 (simhash 字段)，seed() 在每轮开始时载入最近
+    NEAR_DUP_WINDOW_HOURS 小时的代表帖，之后抓到的转发也能挂到已有代表帖上。
+    载入时只取 _id 和指纹，代表帖文本在命中后由 load_texts() 按 _id 补取。
+    """
+
+    def __init__(self, max_distance: int = None, capacity: int = None, min_length: int = None):
+        self.max_distance = settings.NEAR_DUP_MAX_DISTANCE if max_distance is None else max_distance
+        self.capacity = settings.NEAR_DUP_INDEX_SIZE if capacity is None else capacity
+        self.min_length = settings.NEAR_DUP_MIN_LENGTH if min_length is None else min_length
+
+        n_bands = self.max_distance + 1
+        width = 64 // n_bands
+        self._bands = [
+            (i * width, 64 if i == n_bands - 1 else (i + 1) * width) for i in range(n_bands)
+        ]
+        self._entries = OrderedDict()         # canonical_id -> (指纹, 文本)
+        self._buckets = defaultdict(set)      # (段号, 段值) -> {canonical_id}
+        self.duplicates = 0
+
+    def _band_keys(self, fp: int):
+        for i, (lo, hi) in enumerate(self._bands):
+            yield i, (fp >> lo) & ((1 << (hi - lo)) - 1)
+
+    def _find(self, fp: int, exclude=None):
+        best_id, best_dist = None, self.max_distance + 1
+        seen = {exclude}
+        for key in self._band_keys(fp):
+            for cid in self._buckets.get(key, ()):
+                if cid in seen: continue
+                seen.add(cid)
+                dist = (fp ^ self._entries[cid][0]).bit_count()
+                if dist < best_dist:
+                    best_id, best_dist = cid, dist
+        return best_id
+
+    def _add(self, post_id, fp: int, text: str):
+        # 重新分析的代表帖 (内容可能已变) 先摘掉旧指纹
+        self._remove(post_id)
+        self._entries[post_id] = (fp, text)
+        for key in self._band_keys(fp):
+            self._buckets[key].add(post_id)
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, post_id):
+        entry = self._entries.pop(post_id, None)
+        if entry is None: return
+        for key in self._band_keys(entry[0]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(post_id)
+                if not bucket: del self._buckets[key]
+
+    def seed(self, collection, hours: int = None) -> int:
+        """载入最近 hours 小时内分析过、带指纹的代表帖 (最多 capacity 条)，返回载入条数"""
+        hours = settings.NEAR_DUP_WINDOW_HOURS if hours is None else hours
+        if hours <= 0: return 0
+        try:
+            collection.create_index(
+                [("analyzed_time", -1)], name="simhash_recent",
+                partialFilterExpression={"simhash": {"$type": "number"}},
+            )
+        except Exception as e:
+            logger.warning(f"Simhash index creation warning: {e}")
+
+        cursor = collection.find(
+            {"simhash": {"$type": "number"}, "duplicate_of": None,
+             "analyzed_time": {"$gte": datetime.now() - timedelta(hours=hours)}},
+            {"simhash": 1},
+        ).sort("analyzed_time", -1).limit(self.capacity)
+        docs = list(cursor)
+        # 由旧到新加入，容量淘汰时先淘汰最旧的；文本留空，命中时再取
+        for doc in reversed(docs):
+            self._add(doc["_id"], doc["simhash"] & MASK64, None)
+        return len(docs)
+
+    def load_texts(self, collection, canonical_ids) -> dict:
+        """
+        返回 {canonical_id: 文本}。seed 载入的代表帖没有文本，按 _id 一次查回并缓存到索引里；
+        已被删除或不再有 clean_content 的代表帖不在结果中。
+        """
+        texts, missing = {}, []
+        for cid in set(canonical_ids):
+            entry = self._entries.get(cid)
+            if entry is not None and entry[1] is not None:
+                texts[cid] = entry[1]
+            else:
+                missing.append(cid)
+        if missing:
+            for doc in collection.find({"_id": {"$in": missing}}, {"clean_content": 1}):
+                text = doc.get("clean_content")
+                if not text: continue
+                texts[doc["_id"]] = text
+                if doc["_id"] in self._entries:
+                    self._entries[doc["_id"]] = (self._entries[doc["_id"]][0], text)
+        return texts
+
+    def fingerprint(self, text: str):
+        """参与去重的文本返回其指纹，过短的返回 None"""
+        return simhash(text) if len(text) >= self.min_length else None
+
+    def link(self, post_id, text: str, fp: int = None):
+        """
+        查找近似重复的代表帖：找到时返回 (canonical_id, canonical_text)，
+        否则把当前帖登记为新的代表帖并返回 None。fp 为已算好的指纹 (可省略)。
+        seed 载入的代表帖 canonical_text 为 None，需再经 load_texts() 取回。
+        """
+        if len(text) < self.min_length: return None
+        fp = simhash(text) if fp is None else fp
+        cid = self._find(fp, exclude=post_id)
+        if cid is not None:
+            self._entries.move_to_end(cid)
+            self.duplicates += 1
+            return cid, self._entries[cid][1]
+        self._add(post_id, fp, text)
+        return None
@@ -0,0 +1,218 @@
+import numpy as np
+
+from core.config import settings
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise rows in place (zero rows stay zero)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def _group_sums(X: np.ndarray, labels: np.ndarray):
+    """Per-label row sums of X: returns (unique labels, sums, counts) without a Python loop."""
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    sums = np.add.reduceat(X[order], starts, axis=0)
+    counts = np.diff(np.r_[starts, len(sorted_labels)])
+    return sorted_labels[starts], sums, counts
+
+
+class StreamingClusterer:
+    """
+    Threshold-based agglomeration over L2-normalised embeddings, fed block by block.
+
+    partial_fit assigns each row to its most similar centroid when the cosine similarity
+    reaches `threshold`; the remaining rows greedily seed new clusters (a row joins a new
+    leader from the same block when it is similar enough). Centroids are running means,
+    so one pass costs O(n * clusters * dim) and memory stays O(clusters * dim) no matter
+    how many rows are streamed. Once `max_clusters` is reached, rows go to the nearest
+    existing centroid.
+
+    Early leaders are single rows, so one topic can seed several clusters; merge() joins
+    clusters whose centroids reach the threshold, and refine_* runs a k-means style
+    reassignment pass against the final centroids. Together they remove most of the
+    order dependence of the single greedy pass.
+    """
+
+    def __init__(self, threshold: float = None, max_clusters: int = None):
+        self.threshold = settings.CLUSTER_SIM_THRESHOLD if threshold is None else threshold
+        self.max_clusters = settings.CLUSTER_MAX_TOPICS if max_clusters is None else max_clusters
+        self.dim = None
+        self.n_clusters = 0
+        self._sums = None
+        self._counts = None
+        self._centroids = None
+        self._refine_sums = None
+        self._refine_counts = None
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return self._centroids[:self.n_clusters] if self.n_clusters else np.zeros((0, self.dim or 0), np.float32)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[:self.n_clusters] if self.n_clusters else np.zeros(0, np.int64)
+
+    @property
+    def sums(self) -> np.ndarray:
+        """Un-normalised per-cluster vector sums (what gets persisted between runs)."""
+        return self._sums[:self.n_clusters] if self.n_clusters else np.zeros((0, self.dim or 0), np.float32)
+
+    def _init(self, dim: int, n: int = 0):
+        self.dim = dim
+        capacity = max(min(self.max_clusters, 256), n)
+        self._sums = np.zeros((capacity, dim), np.float32)
+        self._counts = np.zeros(capacity, np.int64)
+        self._centroids = np.zeros((capacity, dim), np.float32)
+
+    def seed(self, sums: np.ndarray, counts: np.ndarray):
+        """Start from previously persisted clusters (vector sums and member counts)."""
+        n = len(sums)
+        if not n: return
+        self._init(sums.shape[1], n)
+        self._sums[:n] = sums
+        self._counts[:n] = counts
+        self.n_clusters = n
+        self._refresh_centroids(np.arange(n))
+
+    def drop(self, mask: np.ndarray) -> np.ndarray:
+        """Remove clusters where mask is True; returns an old -> new label map (-1 for dropped)."""
+        n = self.n_clusters
+        groups = np.where(mask[:n], -1, np.arange(n))
+        return self._compact(groups, self._sums[:n].copy(), self._counts[:n].copy())
+
+    def _new_cluster(self, vector: np.ndarray) -> int:
+        if self.n_clusters == len(self._counts):
+            capacity = min(self.max_clusters, len(self._counts) * 2)
+            for name in ("_sums", "_counts", "_centroids"):
+                old = getattr(self, name)
+                grown = np.zeros((capacity,) + old.shape[1:], old.dtype)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+        label = self.n_clusters
+        self._centroids[label] = vector
+        self.n_clusters += 1
+        return label
+
+    def _accumulate(self, X, labels, sums, counts):
+        uniq, block_sums, block_counts = _group_sums(X, labels)
+        sums[uniq] += block_sums
+        counts[uniq] += block_counts
+        return uniq
+
+    def _refresh_centroids(self, labels):
+        self._centroids[labels] = normalize_rows(self._sums[labels].copy())
+
+    def partial_fit(self, X: np.ndarray) -> np.ndarray:
+        """Cluster one block of normalised float32 rows, returning a label per row."""
+        if len(X) == 0:
+            return np.zeros(0, np.int32)
+        if self.dim is None:
+            self._init(X.shape[1])
+
+        labels = np.full(len(X), -1, np.int32)
+        if self.n_clusters:
+            sims = X @ self.centroids.T
+            best = sims.argmax(axis=1)
+            matched = sims[np.arange(len(X)), best] >= self.threshold
+            labels[matched] = best[matched]
+
+        pending = np.flatnonzero(labels < 0)
+        while pending.size and self.n_clusters < self.max_clusters:
+            leader = self._new_cluster(X[pending[0]])
+            sims = X[pending] @ X[pending[0]]
+            joined = sims >= self.threshold
+            joined[0] = True
+            labels[pending[joined]] = leader
+            pending = pending[~joined]
+        if pending.size:
+            labels[pending] = (X[pending] @ self.centroids.T).argmax(axis=1)
+
+        touched = self._accumulate(X, labels, self._sums, self._counts)
+        self._refresh_centroids(touched)
+        return labels
+
+    def assign(self, X: np.ndarray) -> np.ndarray:
+        """Nearest centroid for each row, without updating the model."""
+        if len(X) == 0 or not self.n_clusters:
+            return np.full(len(X), -1, np.int32)
+        return (X @ self.centroids.T).argmax(axis=1).astype(np.int32)
+
+    def _compact(self, groups: np.ndarray, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Collapse clusters by group id (a label per cluster, -1 to drop); returns the old -> new map."""
+        kept = np.flatnonzero(groups >= 0)
+        remap = np.full(self.n_clusters, -1, np.int32)
+        if kept.size:
+            uniq, inverse = np.unique(groups[kept], return_inverse=True)
+            remap[kept] = inverse
+            n = len(uniq)
+            new_sums = np.zeros((n, self.dim), np.float32)
+            new_counts = np.zeros(n, np.int64)
+            np.add.at(new_sums, inverse, sums[kept])
+            np.add.at(new_counts, inverse, counts[kept])
+        else:
+            n = 0
+        self._sums[:] = 0
+        self._counts[:] = 0
+        if n:
+            self._sums[:n] = new_sums
+            self._counts[:n] = new_counts
+        self.n_clusters = n
+        self._refresh_centroids(np.arange(n))
+        return remap
+
+    def merge(self, threshold: float = None) -> np.ndarray:
+        """
+        Agglomerate clusters whose centroids have cosine similarity >= threshold
+        (connected components). Returns an old -> new label map.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        n = self.n_clusters
+        if n <= 1:
+            return np.arange(n, dtype=np.int32)
+
+        parent = np.arange(n)
+        centroids = self.centroids
+        block = 1024
+        for start in range(0, n, block):
+            sims = centroids[start:start + block] @ centroids.T
+            rows, cols = np.nonzero(sims >= threshold)
+            rows += start
+            for a, b in zip(rows[rows < cols], cols[rows < cols]):
+                ra, rb = a, b
+                while parent[ra] != ra: ra = parent[ra]
+                while parent[rb] != rb: rb = parent[rb]
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+        for i in range(n):
+            root = i
+            while parent[root] != root: root = parent[root]
+            parent[i] = root
+
+        return self._compact(parent, self._sums[:n].copy(), self._counts[:n].copy())
+
+    def refine_begin(self):
+        self._refine_sums = np.zeros_like(self._sums)
+        self._refine_counts = np.zeros_like(self._counts)
+
+    def refine_partial(self, X: np.ndarray) -> np.ndarray:
+        labels = self.assign(X)
+        if len(X):
+            self._accumulate(X, labels, self._refine_sums, self._refine_counts)
+        return labels
+
+    def refine_end(self) -> np.ndarray:
+        """
+        Replace centroids with the means of the reassignment pass and drop clusters that
+        lost all members. Returns an old -> new label map (-1 for dropped clusters).
+        """
+        n = self.n_clusters
+        counts = self._refine_counts[:n].copy()
+        groups = np.where(counts > 0, np.arange(n), -1)
+        remap = self._compact(groups, self._refine_sums[:n].copy(), counts)
+        self._refine_sums = self._refine_counts = None
+        return remap
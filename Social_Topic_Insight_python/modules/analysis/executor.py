@@ -0,0 +1,137 @@
+import atexit
+import math
+import multiprocessing as mp
+import os
+import threading
+
+from core.config import settings
+from core.logger import logger
+from .cleaning import TextCleaner
+from .nlp_base import NLPProcessor
+
+
+def _init_worker(threads: int):
+    """子进程初始化：按分配到的核数限制推理线程，避免多个进程争抢 CPU"""
+    if settings.NLP_BACKEND == "onnx":
+        # ONNX Runtime 的线程池不能跨 fork 使用，由子进程自己创建 session
+        settings.ONNX_INTRA_OP_THREADS = threads
+        NLPProcessor().warmup()
+        return
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _analyze_chunk(args):
+    texts, top_k = args
+    return NLPProcessor().analyze_batch(texts, top_k=top_k)
+
+
+def _keywords_chunk(args):
+    texts, top_k = args
+    return NLPProcessor().get_keywords_batch(texts, top_k=top_k)
+
+
+def _clean_chunk(texts):
+    return list(TextCleaner.clean_many(texts))
+
+
+class AnalysisExecutor:
+    """
+    预 fork 的多进程分析执行器。
+
+    父进程先加载好模型，再 fork 出 N 个子进程，模型权重以写时复制方式共享；
+    每个子进程分到 cpu_count / N 个推理线程。analyze_batch / clean_batch 把一批文本
+    切成 N 份并行处理，结果按输入顺序合并返回。
+    注意：父进程在 fork 前不能做推理，否则 OpenMP 线程池在子进程里可能死锁。
+    常驻进程 (worker / API) 应通过 shared() 取同一个执行器：进程池只 fork 一次，
+    父进程里的推理 (批处理失败重试、聚类补关键词) 也都交给子进程，父进程始终不做推理。
+    不支持 fork 的平台 (Windows) 或 workers <= 1 时退化为当前进程内执行。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers: int = None):
+        workers = settings.ANALYSIS_WORKERS if workers is None else workers
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        self._pool = None
+        self._pid = os.getpid()
+
+    @classmethod
+    def shared(cls) -> "AnalysisExecutor":
+        """当前进程共享的执行器，第一次调用时启动，进程退出时关闭"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared._pid != os.getpid():
+                cls._shared = cls().start()
+                atexit.register(cls._shared.close)
+            return cls._shared
+
+    @property
+    def parallel(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        if self._pool is not None: return self
+        if self.workers <= 1 or "fork" not in mp.get_all_start_methods():
+            logger.info("AnalysisExecutor running in-process (workers=1 or fork unavailable)")
+            return self
+
+        # --warmup 的后台加载线程必须先结束，带着加载到一半的线程 fork 不安全
+        NLPProcessor().wait_warmup()
+        if settings.NLP_BACKEND != "onnx":
+            NLPProcessor().warmup()
+
+        ctx = mp.get_context("fork")
+        self._pool = ctx.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+        logger.info(
+            f"AnalysisExecutor started: workers={self.workers}, threads/worker={self.threads_per_worker}"
+        )
+        return self
+
+    def _map(self, fn, texts, *args):
+        """把 texts 切成 workers 份在进程池里执行，结果按输入顺序拼接"""
+        chunk = math.ceil(len(texts) / self.workers)
+        chunks = [(texts[i:i + chunk], *args) if args else texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+        results = []
+        for part in self._pool.map(fn, chunks):
+            results.extend(part)
+        return results
+
+    def analyze_batch(self, texts, top_k: int = 5):
+        if not texts: return []
+        if self._pool is None:
+            return NLPProcessor().analyze_batch(texts, top_k=top_k)
+        return self._map(_analyze_chunk, texts, top_k)
+
+    def keywords_batch(self, texts, top_k: int = 5):
+        """批量提取关键词 (聚类时给没有关键词的帖子补全)，同样在子进程里推理"""
+        if not texts: return []
+        if self._pool is None:
+            return NLPProcessor().get_keywords_batch(texts, top_k=top_k)
+        return self._map(_keywords_chunk, texts, top_k)
+
+    def clean_batch(self, texts):
+        """清洗一批原始文本，结果按输入顺序返回；与 analyze_batch 共用同一个进程池"""
+        if not texts: return []
+        if self._pool is None:
+            return _clean_chunk(texts)
+        return self._map(_clean_chunk, texts)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,594 @@
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+
+from core.config import settings
+from core.database import db
+from core.logger import logger
+from models.topic import AnalyzedTopic
+from .clustering import POST_PROJECTION, REP_DOC_LIMIT, TOPIC_INDEXES, TOPIC_STATE_COLLECTION, TREND_INDEXES
+from .burst import BurstState, expire_stale_bursts, replay
+from .embedding_cluster import StreamingClusterer, normalize_rows
+from .layout import TopicLayout
+from .related import related_topics, to_pairs, top_k_similar
+from .rollups import ROLLUP_COLLECTION, ROLLUP_INDEXES, RollupWriter
+from .snapshot import CollectionSnapshot
+
+META_ID = "__meta__"
+# Keyword counters kept per topic in the state document (approximate heavy hitters).
+KEYWORD_STATE_LIMIT = 200
+# analyzed_topics fields not derived from a topic's state: Java naming, rank changes, the
+# related-topic edges written by _update_topic_map and the burst fields written by _update_bursts.
+# Topic rewrites leave them untouched.
+PRESERVED_TOPIC_FIELDS = ("name", "related_topics", "rank_change", "is_burst", "burst_score")
+
+
+def _min_time(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max_time(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+class TopicDelta:
+    """Signed change to one topic's running aggregates."""
+
+    __slots__ = ("posts", "heat", "sent_sum", "sent_count", "keywords", "geo", "min_time", "max_time", "rep_docs", "trend")
+
+    def __init__(self):
+        self.posts = 0
+        self.heat = 0
+        self.sent_sum = 0.0
+        self.sent_count = 0
+        self.keywords = Counter()
+        self.geo = Counter()
+        self.min_time = None
+        self.max_time = None
+        self.rep_docs = []
+        # time_bucket string -> [heat, count, sent_sum, sent_count, rep_post]
+        self.trend = {}
+
+    def apply(self, contrib: dict, sign: int, post: dict = None, publish_time: datetime = None, rep_doc: bool = False):
+        self.posts += sign
+        self.heat += sign * contrib["heat"]
+        sent = contrib.get("sent")
+        if sent is not None:
+            self.sent_sum += sign * sent
+            self.sent_count += sign
+        for kw in contrib["keywords"]:
+            self.keywords[kw] += sign
+        if contrib.get("geo"):
+            self.geo[contrib["geo"]] += sign
+
+        t = self.trend.get(contrib["bucket"])
+        if t is None:
+            t = self.trend[contrib["bucket"]] = [0, 0, 0.0, 0, None]
+        t[0] += sign * contrib["heat"]
+        t[1] += sign
+        if sent is not None:
+            t[2] += sign * sent
+            t[3] += sign
+
+        if sign > 0 and post is not None:
+            t[4] = post.get("post_id")
+            self.min_time = _min_time(self.min_time, publish_time)
+            self.max_time = _max_time(self.max_time, publish_time)
+            if rep_doc and len(self.rep_docs) < REP_DOC_LIMIT:
+                text = (post.get("clean_content") or "").strip()
+                if text:
+                    self.rep_docs.append(text[:200])
+
+    @classmethod
+    def from_state(cls, state: dict) -> "TopicDelta":
+        """The whole persisted topic as a delta (used when merging topics)."""
+        d = cls()
+        d.posts = state.get("post_count", 0)
+        d.heat = state.get("heat", 0)
+        d.sent_sum = state.get("sent_sum", 0.0)
+        d.sent_count = state.get("sent_count", 0)
+        d.keywords = Counter(dict(state.get("keywords") or []))
+        d.geo = Counter(dict(state.get("geo") or []))
+        d.min_time = state.get("min_time")
+        d.max_time = state.get("max_time")
+        d.rep_docs = list(state.get("rep_docs") or [])
+        return d
+
+
+class IncrementalClusterer:
+    """
+    Incremental topic assignment against persisted topic centroids.
+
+    State lives in `topic_centroids`, one document per topic sharing the analyzed_topics _id:
+    the embedding sum / count behind the centroid plus running aggregates (heat, sentiment
+    sums, keyword and geo counters, time bounds, representative docs). Each run only reads
+    posts flagged `cluster_pending` by the analysis stage, assigns new ones to the nearest
+    centroid (or starts a topic via StreamingClusterer), and rewrites just the touched topics
+    and trend buckets (hourly topic_trends plus the minute / hour / day rollups).
+
+    Every assigned post keeps its `cluster_contrib` (topic, heat, sentiment, bucket, time,
+    keywords, geo). A re-analysed post (e.g. re-crawled with new metrics) stays in its topic
+    and has its old contribution swapped for the new one. Time bounds only widen.
+
+    Compaction (every CLUSTER_COMPACT_INTERVAL_HOURS, or when the topic cap is nearly reached)
+    drops emptied topics and merges topics whose centroids converged.
+
+    The first run with empty state bootstraps from all processed posts into staging snapshots
+    (see CollectionSnapshot) that replace the live collections only once the run completes.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.posts = db.get_collection("social_posts")
+        self.topics = db.get_collection("analyzed_topics")
+        self.trends = db.get_collection("topic_trends")
+        self.state = db.get_collection(TOPIC_STATE_COLLECTION)
+        self.rollups = RollupWriter()
+
+        self.clusterer = StreamingClusterer()
+        self.label_ids = []
+        self.label_of = {}
+        self.new_topics = 0
+
+        try:
+            self.posts.create_index("cluster_pending", sparse=True)
+            self.trends.create_index([("topic_ref_id", 1), ("time_bucket", 1)])
+            self.rollups.ensure_indexes()
+        except Exception as e:
+            logger.warning(f"Incremental clustering index creation warning: {e}")
+
+    # ---------- state ----------
+
+    def _load_state(self):
+        sums, counts, ids = [], [], []
+        cursor = self.state.find({"_id": {"$type": "objectId"}}, {"centroid_sum": 1, "vec_count": 1}).sort("_id", 1)
+        for doc in cursor:
+            ids.append(doc["_id"])
+            sums.append(doc.get("centroid_sum") or [])
+            counts.append(doc.get("vec_count", 0))
+        if ids:
+            self.clusterer.seed(np.asarray(sums, dtype=np.float32), np.asarray(counts, dtype=np.int64))
+        self._set_labels(ids)
+
+    def _set_labels(self, ids):
+        self.label_ids = list(ids)
+        self.label_of = {tid: i for i, tid in enumerate(self.label_ids)}
+
+    def _topic_id(self, label: int) -> ObjectId:
+        while label >= len(self.label_ids):
+            tid = ObjectId()
+            self.label_of[tid] = len(self.label_ids)
+            self.label_ids.append(tid)
+            self.new_topics += 1
+        return self.label_ids[label]
+
+    # ---------- main loop ----------
+
+    def run(self, task_id=None):
+        t0 = time.perf_counter()
+        task_value = str(task_id) if task_id else None
+        self._load_state()
+
+        snapshots = []
+        if self.label_ids:
+            query_filter = {"process_status": 1, "cluster_pending": True}
+            if task_id:
+                query_filter["task_id"] = task_value
+        else:
+            # No state yet: rebuild from all history into staging collections; readers keep
+            # whatever snapshot a full rebuild left until the new one is swapped in.
+            logger.info("Incremental clustering: no topic state, bootstrapping from all processed posts")
+            snapshots = self._stage_bootstrap()
+            query_filter = {"process_status": 1}
+
+        try:
+            projection = dict(POST_PROJECTION, embedding=1, cluster_contrib=1, analyzed_time=1)
+            cursor = self.posts.find(query_filter, projection).batch_size(2000)
+
+            total, touched = 0, set()
+            block = []
+            for post in cursor:
+                block.append(post)
+                if len(block) >= settings.CLUSTER_BLOCK_SIZE:
+                    touched |= self._process_block(block, task_value)
+                    total += len(block)
+                    block = []
+            if block:
+                touched |= self._process_block(block, task_value)
+                total += len(block)
+
+            compacted = self._maybe_compact(task_value)
+            if touched or compacted:
+                self._refresh_hot_flags()
+                self._update_topic_map(touched, refit=compacted)
+            expire_stale_bursts(self.topics, datetime.now())
+
+            # Same order as the full rebuild: for the instant between the renames, old topics see new trends.
+            for snapshot in snapshots:
+                snapshot.publish()
+        except Exception:
+            if snapshots:
+                for snapshot in snapshots:
+                    snapshot.discard()
+                # Half-built state would point at topics that were never published; re-bootstrap next run.
+                self.state.delete_many({})
+            raise
+        finally:
+            if snapshots:
+                self._use_collections(db.get_collection("analyzed_topics"), db.get_collection("topic_trends"),
+                                      db.get_collection(ROLLUP_COLLECTION))
+
+        logger.info(
+            f"Incremental clustering finished. posts={total}, touched_topics={len(touched)}, "
+            f"new_topics={self.new_topics}, topics={self.clusterer.n_clusters}, {time.perf_counter() - t0:.2f}s"
+        )
+
+    def _use_collections(self, topics, trends, rollups):
+        self.topics, self.trends, self.rollups.collection = topics, trends, rollups
+
+    def _stage_bootstrap(self) -> list:
+        """Point topic, trend and rollup writes at staging snapshots; returns them in publish order."""
+        snapshots = [
+            CollectionSnapshot(ROLLUP_COLLECTION, ROLLUP_INDEXES),
+            CollectionSnapshot("topic_trends", TREND_INDEXES),
+            CollectionSnapshot("analyzed_topics", TOPIC_INDEXES),
+        ]
+        # The run upserts into the staging collections, so they need their lookup indexes up front.
+        for snapshot in snapshots:
+            snapshot.ensure_indexes()
+        rollup_snapshot, trend_snapshot, topic_snapshot = snapshots
+        self._use_collections(topic_snapshot.collection, trend_snapshot.collection, rollup_snapshot.collection)
+        return snapshots
+
+    def _contrib(self, post: dict, topic_id):
+        publish_time = self.engine._safe_publish_time(post)
+        sent = post.get("sentiment_score")
+        location = post.get("ip_location")
+        contrib = {
+            "topic": topic_id,
+            "heat": self.engine._calc_heat(post.get("metrics") or {}),
+            "sent": float(sent) if sent is not None else None,
+            "bucket": publish_time.strftime("%Y-%m-%d %H:00"),
+            "time": publish_time,
+            "keywords": [kw.strip() for kw in (post.get("keywords") or []) if isinstance(kw, str) and kw.strip()],
+            "geo": str(location) if location else None,
+        }
+        return contrib, publish_time
+
+    def _rollup(self, contrib: dict, sign: int):
+        # Contributions recorded before rollups existed carry only the hour bucket.
+        event_time = contrib.get("time") or datetime.strptime(contrib["bucket"], "%Y-%m-%d %H:00")
+        self.rollups.add(contrib["topic"], event_time, contrib["heat"], contrib.get("sent"), sign)
+
+    @staticmethod
+    def _post_op(post: dict, fields: dict) -> UpdateOne:
+        # Matching analyzed_time leaves a post alone if it was re-analysed while we were clustering.
+        return UpdateOne(
+            {"_id": post["_id"], "analyzed_time": post.get("analyzed_time")},
+            {"$set": fields, "$unset": {"cluster_pending": ""}},
+        )
+
+    def _process_block(self, posts, task_value) -> set:
+        deltas = defaultdict(TopicDelta)
+        post_ops = []
+        new_posts, rows = [], []
+        dim = self.clusterer.dim
+
+        for post in posts:
+            old = post.get("cluster_contrib")
+            old_label = self.label_of.get(old.get("topic")) if old else None
+            if old_label is not None:
+                # Re-analysed post: keep its topic, swap the old contribution for the new one.
+                contrib, publish_time = self._contrib(post, old["topic"])
+                deltas[old_label].apply(old, -1)
+                deltas[old_label].apply(contrib, 1, post, publish_time)
+                self._rollup(old, -1)
+                self._rollup(contrib, 1)
+                post_ops.append(self._post_op(post, {"topic_ref_id": old["topic"], "cluster_contrib": contrib}))
+                continue
+
+            embedding = post.get("embedding")
+            dim = dim or (len(embedding) if embedding else None)
+            if not embedding or len(embedding) != dim:
+                post_ops.append(self._post_op(post, {"cluster_contrib": None}))
+                continue
+            new_posts.append(post)
+            rows.append(embedding)
+
+        if rows:
+            labels = self.clusterer.partial_fit(normalize_rows(np.asarray(rows, dtype=np.float32)))
+            for post, label in zip(new_posts, labels):
+                topic_id = self._topic_id(int(label))
+                contrib, publish_time = self._contrib(post, topic_id)
+                deltas[int(label)].apply(contrib, 1, post, publish_time, rep_doc=not post.get("duplicate_of"))
+                self._rollup(contrib, 1)
+                post_ops.append(self._post_op(post, {"topic_ref_id": topic_id, "cluster_contrib": contrib}))
+
+        touched = {self.label_ids[label]: delta for label, delta in deltas.items()}
+        self._apply_deltas(touched, task_value)
+        if post_ops:
+            self.posts.bulk_write(post_ops, ordered=False)
+        return set(touched)
+
+    # ---------- writes ----------
+
+    def _combine(self, state: dict, delta: TopicDelta) -> dict:
+        keywords = Counter(dict(state.get("keywords") or []))
+        keywords.update(delta.keywords)
+        geo = Counter(dict(state.get("geo") or []))
+        geo.update(delta.geo)
+        return {
+            "post_count": state.get("post_count", 0) + delta.posts,
+            "heat": state.get("heat", 0) + delta.heat,
+            "sent_sum": state.get("sent_sum", 0.0) + delta.sent_sum,
+            "sent_count": state.get("sent_count", 0) + delta.sent_count,
+            "keywords": [[k, n] for k, n in keywords.most_common(KEYWORD_STATE_LIMIT) if n > 0],
+            "geo": [[k, n] for k, n in geo.most_common() if n > 0],
+            "min_time": _min_time(state.get("min_time"), delta.min_time),
+            "max_time": _max_time(state.get("max_time"), delta.max_time),
+            "rep_docs": (list(state.get("rep_docs") or []) + delta.rep_docs)[:REP_DOC_LIMIT],
+        }
+
+    def _topic_fields(self, topic_id, state: dict, task_value) -> dict:
+        now = datetime.now()
+        post_count = state["post_count"]
+        first_time = state["min_time"] or now
+        keywords = [k for k, _ in state["keywords"][:10]] or ["其他话题"]
+        avg_sent = (state["sent_sum"] / state["sent_count"]) if state["sent_count"] > 0 else 0.0
+
+        topic = AnalyzedTopic(
+            name="",
+            keywords=keywords,
+            total_heat=int(state["heat"]),
+            post_count=post_count,
+            avg_sentiment=round(avg_sent, 4),
+            first_occur_time=first_time,
+            last_active_time=state["max_time"] or now,
+            geo_distribution=[{"name": k, "value": v} for k, v in state["geo"][:10]],
+        )
+        fields = topic.model_dump(by_alias=True, exclude={"id", *PRESERVED_TOPIC_FIELDS})
+        fields.update({"task_id": task_value, "rep_docs": state["rep_docs"]})
+        return fields
+
+    def _apply_deltas(self, deltas: dict, task_value):
+        """Fold per-topic deltas into state, analyzed_topics and topic_trends."""
+        if not deltas: return
+        ids = list(deltas)
+        current = {doc["_id"]: doc for doc in self.state.find({"_id": {"$in": ids}}, {"centroid_sum": 0})}
+        sums, counts = self.clusterer.sums, self.clusterer.counts
+        now = datetime.now()
+
+        state_ops, topic_ops, emptied = [], [], []
+        for tid, delta in deltas.items():
+            state = self._combine(current.get(tid, {}), delta)
+            label = self.label_of[tid]
+            state_ops.append(UpdateOne(
+                {"_id": tid},
+                {"$set": dict(state, centroid_sum=sums[label].tolist(), vec_count=int(counts[label]), updated_at=now)},
+                upsert=True,
+            ))
+            if state["post_count"] <= 0:
+                emptied.append(tid)
+                continue
+            topic_ops.append(UpdateOne(
+                {"_id": tid},
+                {"$set": self._topic_fields(tid, state, task_value),
+                 "$setOnInsert": {"name": "", "related_topics": [], "rank_change": 0, "is_hot_top50": False,
+                                  "is_burst": False, "burst_score": 0.0}},
+                upsert=True,
+            ))
+
+        self.state.bulk_write(state_ops, ordered=False)
+        if topic_ops:
+            self.topics.bulk_write(topic_ops, ordered=False)
+        self.rollups.flush(task_value)
+        if emptied:
+            # State stays until compaction drops the centroid; readers stop seeing the topic now.
+            self.topics.delete_many({"_id": {"$in": emptied}})
+            self.trends.delete_many({"topic_ref_id": {"$in": emptied}})
+            self.rollups.drop(emptied)
+
+        self._update_bursts(self._apply_trends({tid: d.trend for tid, d in deltas.items() if tid not in emptied}, task_value))
+
+    def _apply_trends(self, trends: dict, task_value) -> dict:
+        """
+        $inc hourly buckets, then recompute the average sentiment of the touched buckets.
+        Returns the new totals of the touched buckets: {topic_id: {time_bucket: (heat, count)}}.
+        """
+        ops, buckets = [], set()
+        for tid, trend in trends.items():
+            for bucket, (heat, count, sent_sum, sent_count, rep_post) in trend.items():
+                buckets.add(bucket)
+                update = {
+                    "$inc": {"heat_value": int(heat), "post_count": count, "sent_sum": sent_sum, "sent_count": sent_count},
+                    "$set": {"task_id": task_value},
+                    "$setOnInsert": {"sentiment_value": 0.0},
+                }
+                if rep_post is not None:
+                    update["$set"]["representative_post"] = rep_post
+                ops.append(UpdateOne({"topic_ref_id": tid, "time_bucket": bucket}, update, upsert=True))
+        if not ops: return {}
+        self.trends.bulk_write(ops, ordered=False)
+
+        fix_ops, stale = [], []
+        totals = defaultdict(dict)
+        cursor = self.trends.find(
+            {"topic_ref_id": {"$in": list(trends)}, "time_bucket": {"$in": list(buckets)}},
+            {"topic_ref_id": 1, "time_bucket": 1, "heat_value": 1, "post_count": 1, "sent_sum": 1, "sent_count": 1},
+        )
+        for doc in cursor:
+            tid, bucket = doc["topic_ref_id"], doc["time_bucket"]
+            if bucket in trends.get(tid, ()):
+                totals[tid][bucket] = (max(doc.get("heat_value", 0), 0), max(doc.get("post_count", 0), 0))
+            if doc.get("post_count", 0) <= 0:
+                stale.append(doc["_id"])
+                continue
+            sent_count = doc.get("sent_count", 0)
+            avg = (doc.get("sent_sum", 0.0) / sent_count) if sent_count > 0 else 0.0
+            fix_ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"sentiment_value": round(avg, 4)}}))
+        if fix_ops:
+            self.trends.bulk_write(fix_ops, ordered=False)
+        if stale:
+            self.trends.delete_many({"_id": {"$in": stale}})
+        return totals
+
+    def _update_bursts(self, totals: dict):
+        """Advance each touched topic's BurstState with the new totals of its touched hours."""
+        if not totals: return
+        now = datetime.now()
+        ops = []
+        for doc in self.topics.find({"_id": {"$in": list(totals)}}, {"burst_state": 1}):
+            state = BurstState.from_doc(doc.get("burst_state"))
+            for bucket in sorted(totals[doc["_id"]]):
+                heat, count = totals[doc["_id"]][bucket]
+                state.advance(datetime.strptime(bucket, "%Y-%m-%d %H:00"), heat, count)
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": state.topic_fields(now)}))
+        if ops:
+            self.topics.bulk_write(ops, ordered=False)
+
+    def _refresh_hot_flags(self):
+        top = [doc["_id"] for doc in self.topics.find({}, {"_id": 1}).sort("total_heat", DESCENDING).limit(50)]
+        self.topics.update_many({"is_hot_top50": True, "_id": {"$nin": top}}, {"$set": {"is_hot_top50": False}})
+        self.topics.update_many({"_id": {"$in": top}}, {"$set": {"is_hot_top50": True}})
+
+    def _update_topic_map(self, touched: set, refit: bool = False):
+        """
+        Map coordinates and related-topic edges. Everything is recomputed when there is no layout
+        basis yet, after compaction, or when more than LAYOUT_REFIT_RATIO of the topics changed;
+        otherwise only the touched topics are re-projected and get fresh neighbour lists.
+        """
+        n = self.clusterer.n_clusters
+        if not n: return
+        centroids = self.clusterer.centroids
+        ids = self.label_ids[:n]
+        layout = TopicLayout.load("embedding")
+        if refit or not layout.fitted(centroids.shape[1]) or len(touched) > settings.LAYOUT_REFIT_RATIO * n:
+            rows = list(range(n))
+            coords = layout.fit(centroids)
+            layout.save()
+            neighbours = related_topics(centroids)
+        else:
+            rows = [self.label_of[tid] for tid in touched if self.label_of.get(tid, n) < n]
+            coords = layout.project(centroids[rows])
+            neighbours = to_pairs(*top_k_similar(centroids, settings.RELATED_TOP_K, rows=rows),
+                                  settings.RELATED_MIN_SIMILARITY)
+
+        ops = [
+            UpdateOne({"_id": ids[row]}, {"$set": {
+                "x": float(x),
+                "y": float(y),
+                "related_topics": [{"topic_id": str(ids[j]), "similarity": sim} for j, sim in pairs],
+            }})
+            for row, (x, y), pairs in zip(rows, coords, neighbours)
+        ]
+        if ops:
+            self.topics.bulk_write(ops, ordered=False)
+
+    # ---------- compaction ----------
+
+    def _maybe_compact(self, task_value):
+        meta = self.state.find_one({"_id": META_ID}) or {}
+        last = meta.get("last_compact")
+        now = datetime.now()
+        due = (
+            last is None
+            or now - last >= timedelta(hours=settings.CLUSTER_COMPACT_INTERVAL_HOURS)
+            or self.clusterer.n_clusters >= 0.9 * self.clusterer.max_clusters
+        )
+        if not due or not self.label_ids:
+            return False
+        self.compact(task_value)
+        self.state.update_one({"_id": META_ID}, {"$set": {"last_compact": now}}, upsert=True)
+        return True
+
+    def compact(self, task_value=None):
+        """Drop emptied topics, then merge topics whose centroids reach CLUSTER_SIM_THRESHOLD."""
+        t0 = time.perf_counter()
+        states = {doc["_id"]: doc for doc in self.state.find({"_id": {"$in": self.label_ids}}, {"centroid_sum": 0})}
+
+        empty = np.array([states.get(tid, {}).get("post_count", 0) <= 0 for tid in self.label_ids])
+        dropped = [tid for tid, e in zip(self.label_ids, empty) if e]
+        if dropped:
+            self.clusterer.drop(empty)
+            self.state.delete_many({"_id": {"$in": dropped}})
+            self.topics.delete_many({"_id": {"$in": dropped}})
+            self.trends.delete_many({"topic_ref_id": {"$in": dropped}})
+            self.rollups.drop(dropped)
+            self._set_labels([tid for tid, e in zip(self.label_ids, empty) if not e])
+
+        remap = self.clusterer.merge()
+        groups = defaultdict(list)
+        for old_label, new_label in enumerate(remap):
+            groups[int(new_label)].append(self.label_ids[old_label])
+
+        survivors = [None] * self.clusterer.n_clusters
+        merged = 0
+        for new_label, members in groups.items():
+            members.sort(key=lambda tid: states.get(tid, {}).get("post_count", 0), reverse=True)
+            survivor, absorbed = members[0], members[1:]
+            survivors[new_label] = survivor
+            if absorbed:
+                merged += len(absorbed)
+                self._absorb(survivor, absorbed, states, new_label, task_value)
+        self._set_labels(survivors)
+
+        logger.info(f"Topic compaction: dropped={len(dropped)}, merged={merged}, "
+                    f"topics={self.clusterer.n_clusters}, {time.perf_counter() - t0:.2f}s")
+
+    def _absorb(self, survivor, absorbed, states, label, task_value):
+        delta = TopicDelta()
+        for tid in absorbed:
+            other = TopicDelta.from_state(states.get(tid, {}))
+            delta.posts += other.posts
+            delta.heat += other.heat
+            delta.sent_sum += other.sent_sum
+            delta.sent_count += other.sent_count
+            delta.keywords.update(other.keywords)
+            delta.geo.update(other.geo)
+            delta.min_time = _min_time(delta.min_time, other.min_time)
+            delta.max_time = _max_time(delta.max_time, other.max_time)
+            delta.rep_docs.extend(other.rep_docs)
+        state = self._combine(states.get(survivor, {}), delta)
+
+        self.state.update_one({"_id": survivor}, {"$set": dict(
+            state,
+            centroid_sum=self.clusterer.sums[label].tolist(),
+            vec_count=int(self.clusterer.counts[label]),
+            updated_at=datetime.now(),
+        )})
+        self.topics.update_one({"_id": survivor}, {"$set": self._topic_fields(survivor, state, task_value)})
+        self.state.delete_many({"_id": {"$in": absorbed}})
+        self.topics.delete_many({"_id": {"$in": absorbed}})
+        self.posts.update_many(
+            {"topic_ref_id": {"$in": absorbed}},
+            {"$set": {"topic_ref_id": survivor, "cluster_contrib.topic": survivor}},
+        )
+
+        trend = {}
+        for doc in self.trends.find({"topic_ref_id": {"$in": absorbed}}):
+            t = trend.setdefault(doc["time_bucket"], [0, 0, 0.0, 0, None])
+            t[0] += doc.get("heat_value", 0)
+            t[1] += doc.get("post_count", 0)
+            t[2] += doc.get("sent_sum", doc.get("sentiment_value", 0.0) * doc.get("post_count", 0))
+            t[3] += doc.get("sent_count", doc.get("post_count", 0))
+            t[4] = t[4] or doc.get("representative_post")
+        self.trends.delete_many({"topic_ref_id": {"$in": absorbed}})
+        self.rollups.move(absorbed, survivor, task_value)
+        self._apply_trends({survivor: trend}, task_value)
+        self._replay_burst(survivor)
+
+    def _replay_burst(self, topic_id):
+        """
+        Rebuild a topic's BurstState from its whole hourly series. After a merge the survivor's
+        baseline only covers its own history while the open hour now holds the absorbed heat too,
+        so advancing the old state would flag a spurious burst.
+        """
+        trend = {
+            datetime.strptime(doc["time_bucket"], "%Y-%m-%d %H:00"): (doc.get("heat_value", 0), doc.get("post_count", 0))
+            for doc in self.trends.find({"topic_ref_id": topic_id}, {"time_bucket": 1, "heat_value": 1, "post_count": 1})
+        }
+        self.topics.update_one({"_id": topic_id}, {"$set": replay(trend).topic_fields(datetime.now())})
@@ -0,0 +1,136 @@
+import zlib
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from core.config import settings
+from core.database import db
+from .embedding_cluster import normalize_rows
+
+LAYOUT_COLLECTION = "topic_layout"
+# Coordinates are scaled so the farthest topic sits at this value on either axis.
+COORD_RANGE = 10.0
+KEYWORD_DIM = 512
+
+
+def keyword_vectors(keyword_counts: List[Dict[str, int]]) -> np.ndarray:
+    """
+    TF-IDF keyword profiles, one row per topic, hashed into KEYWORD_DIM columns with crc32
+    (stable across processes, unlike hash()). Used where topics have no embedding centroid.
+    """
+    n = len(keyword_counts)
+    X = np.zeros((n, KEYWORD_DIM), np.float32)
+    for i, counts in enumerate(keyword_counts):
+        for term, count in counts.items():
+            X[i, zlib.crc32(term.encode("utf-8")) % KEYWORD_DIM] += count
+    df = np.count_nonzero(X, axis=0)
+    X *= (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    return normalize_rows(X)
+
+
+def _pairwise_distances(X: np.ndarray) -> np.ndarray:
+    sq = np.einsum("ij,ij->i", X, X)
+    d2 = sq[:, None] + sq[None, :] - 2 * (X @ X.T)
+    return np.sqrt(np.maximum(d2, 0))
+
+
+def _smacof(target: np.ndarray, Y: np.ndarray, iters: int) -> np.ndarray:
+    """Stress majorisation (Guttman transform) of Y towards the target distances, unit weights."""
+    n = len(Y)
+    for _ in range(iters):
+        dist = _pairwise_distances(Y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            B = np.where(dist > 1e-12, -target / dist, 0.0)
+        np.fill_diagonal(B, 0.0)
+        np.fill_diagonal(B, -B.sum(axis=1))
+        Y = B @ Y / n
+    return Y
+
+
+class TopicLayout:
+    """
+    Deterministic 2D positions for the /graph intertopic map, from topic vectors
+    (embedding centroids; hashed keyword profiles when posts carry no embedding).
+
+    fit() projects the centred vectors on their first two principal components (SVD).
+    Component signs follow the basis persisted by the previous fit (or the largest
+    loading when there is none), so the map keeps its orientation between runs. Maps of
+    up to LAYOUT_REFINE_MAX_TOPICS topics then get LAYOUT_REFINE_ITERS SMACOF iterations
+    on the pairwise distances, starting from the PCA layout.
+
+    project() places vectors with the persisted basis alone, which is how incremental runs
+    move the few topics they touched without re-laying out the rest.
+    """
+
+    def __init__(self, space: str, mean=None, components=None, scale: float = 1.0):
+        self.space = space
+        self.mean = mean
+        self.components = components
+        self.scale = scale
+
+    @classmethod
+    def load(cls, space: str) -> "TopicLayout":
+        doc = db.get_collection(LAYOUT_COLLECTION).find_one({"_id": space})
+        if not doc:
+            return cls(space)
+        return cls(
+            space,
+            mean=np.asarray(doc["mean"], dtype=np.float32),
+            components=np.asarray(doc["components"], dtype=np.float32),
+            scale=float(doc["scale"]),
+        )
+
+    def save(self):
+        if self.components is None: return
+        db.get_collection(LAYOUT_COLLECTION).update_one({"_id": self.space}, {"$set": {
+            "mean": self.mean.tolist(),
+            "components": self.components.tolist(),
+            "scale": self.scale,
+            "updated_at": datetime.now(),
+        }}, upsert=True)
+
+    def fitted(self, dim: int) -> bool:
+        return self.components is not None and self.components.shape[1] == dim
+
+    def _principal_components(self, Xc: np.ndarray) -> np.ndarray:
+        n, dim = Xc.shape
+        if n <= dim:
+            _, _, vt = np.linalg.svd(Xc, full_matrices=False)
+            components = vt[:2]
+        else:
+            # More topics than dimensions: the dim x dim covariance is the cheaper decomposition.
+            _, vectors = np.linalg.eigh(Xc.T @ Xc)
+            components = vectors[:, ::-1][:, :2].T
+        if len(components) < 2:
+            components = np.vstack([components, np.zeros((2 - len(components), dim), Xc.dtype)])
+
+        previous = self.components if self.fitted(dim) else None
+        for k in range(2):
+            ref = components[k] @ previous[k] if previous is not None else components[k][np.argmax(np.abs(components[k]))]
+            if ref < 0:
+                components[k] = -components[k]
+        return components.astype(np.float32)
+
+    def fit(self, X: np.ndarray) -> np.ndarray:
+        """Lay out all rows of X; returns an (n, 2) array of coordinates and keeps the basis."""
+        X = np.asarray(X, dtype=np.float32)
+        self.mean = X.mean(axis=0)
+        Xc = X - self.mean
+        self.components = self._principal_components(Xc)
+        pca = (Xc @ self.components.T).astype(np.float64)
+        Y = pca
+        if 2 < len(X) <= settings.LAYOUT_REFINE_MAX_TOPICS and settings.LAYOUT_REFINE_ITERS > 0:
+            Y = _smacof(_pairwise_distances(X), pca, settings.LAYOUT_REFINE_ITERS)
+
+        extent = float(np.abs(Y).max()) if len(Y) else 0.0
+        scale = COORD_RANGE / extent if extent > 1e-12 else 1.0
+        # project() only has the PCA basis; fold the refinement's overall stretch into its scale.
+        norm = float((pca * pca).sum())
+        self.scale = scale * float((pca * Y).sum()) / norm if norm > 1e-12 else scale
+        return np.round(Y * scale, 4)
+
+    def project(self, X: np.ndarray) -> np.ndarray:
+        """Coordinates of rows of X under the current basis (the layout itself is unchanged)."""
+        X = np.asarray(X, dtype=np.float32)
+        return np.round(((X - self.mean) @ self.components.T) * self.scale, 4)
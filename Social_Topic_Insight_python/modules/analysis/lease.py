@@ -0,0 +1,109 @@
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from core.config import settings
+from core.logger import logger
+
+# social_posts.process_status
+STATUS_PENDING = 0
+STATUS_DONE = 1
+STATUS_FAILED = -1
+STATUS_CLAIMED = 2
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class PostLeaseQueue:
+    """
+    基于租约的待分析帖子领取协议，多个 worker 可以安全地消费同一批积压数据。
+
+    - claim: 把一批 process_status=0 (或租约已过期的 2) 的帖子原子地改为 2，
+      写入 worker_id / 本次领取的 lease_token / 过期时间，再按 token 取回
+    - renew: 批次在流水线队列里排队后、推理前顺延租约，避免推理慢时租约在排队期间过期
+    - 最终写回时过滤条件带上 lease_token 和 process_status=2 (见 lease_filter)，
+      租约过期后被别的 worker 重新领取、或分析途中被重新抓取 (重置为 0) 的帖子不会被旧 worker 覆盖
+    """
+
+    LEASE_FIELDS = {"lease_owner": "", "lease_token": "", "lease_expires": ""}
+
+    def __init__(self, collection, task_id=None, worker_id: str = None, lease_seconds: int = None):
+        self.collection = collection
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds or settings.ANALYSIS_LEASE_SECONDS
+        self.base_filter = {"task_id": str(task_id)} if task_id else {}
+
+        try:
+            self.collection.create_index([("process_status", 1), ("lease_expires", 1)])
+            self.collection.create_index("lease_token", sparse=True)
+        except Exception as e:
+            logger.warning(f"Lease index creation warning: {e}")
+
+    def _claimable(self, now: datetime) -> dict:
+        return {
+            **self.base_filter,
+            "$or": [
+                {"process_status": STATUS_PENDING},
+                {"process_status": STATUS_CLAIMED, "lease_expires": {"$lt": now}},
+            ],
+        }
+
+    def claim(self, limit: int):
+        """
+        领取最多 limit 条帖子并返回其文档。
+        与其他 worker 竞争时可能少于 limit 条；返回空列表表示积压已清空。
+        """
+        while True:
+            now = datetime.now()
+            candidates = [
+                d["_id"] for d in self.collection.find(self._claimable(now), {"_id": 1}).limit(limit)
+            ]
+            if not candidates:
+                return []
+
+            token = ObjectId()
+            # update_many 对每条文档的过滤与更新是原子的，同一条帖子只会被一个 worker 领到
+            self.collection.update_many(
+                {"_id": {"$in": candidates}, **self._claimable(now)},
+                {"$set": {
+                    "process_status": STATUS_CLAIMED,
+                    "lease_owner": self.worker_id,
+                    "lease_token": token,
+                    "lease_expires": now + timedelta(seconds=self.lease_seconds),
+                }},
+            )
+            posts = list(self.collection.find({"lease_token": token}))
+            if posts:
+                return posts
+            # 候选全部被其他 worker 抢走，重新查一轮
+
+    def renew(self, posts) -> set:
+        """把仍由本 worker 持有的帖子租约从现在起顺延 lease_seconds，返回续约成功的 _id"""
+        by_token = defaultdict(list)
+        for post in posts:
+            by_token[post.get("lease_token")].append(post["_id"])
+        expires = datetime.now() + timedelta(seconds=self.lease_seconds)
+        held = set()
+        for token, ids in by_token.items():
+            flt = self.lease_filter({"_id": {"$in": ids}, "lease_token": token})
+            result = self.collection.update_many(flt, {"$set": {"lease_expires": expires}})
+            if result.matched_count == len(ids):
+                held.update(ids)
+            else:
+                held.update(d["_id"] for d in self.collection.find(flt, {"_id": 1}))
+        return held
+
+    @staticmethod
+    def lease_filter(post: dict) -> dict:
+        """最终写回时使用的过滤条件：只有仍持有租约、且帖子未被重新抓取时才生效"""
+        flt = {"_id": post["_id"], "process_status": STATUS_CLAIMED}
+        token = post.get("lease_token")
+        if token:
+            flt["lease_token"] = token
+        return flt
@@ -1,86 +1,242 @@
 import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from core.config import settings
 from core.database import db
 from core.logger import logger
-from .cleaning import TextCleaner
 from .nlp_base import NLPProcessor
 from .clustering import ClusterEngine
+from .executor import AnalysisExecutor
+from .result_cache import NLPResultCache
+from .dedup import NearDuplicateIndex, to_int64
+from .lease import PostLeaseQueue
+from .pipeline import StagedPipeline
 
 class AnalysisManager:
     def __init__(self):
         self.nlp = NLPProcessor()
         self.is_running = False
 
-    def process_raw_posts(self, task_id=None, batch_size=50):
+    def process_raw_posts(self, task_id=None, batch_size=50, worker_id=None):
         """
         第一阶段：对原始数据进行清洗、NLP提取、向量化
+        以租约方式领取待处理帖子，可以有多个 worker (进程 / 机器) 同时消费同一批积压。
+        领取 -> 清洗 -> 推理 -> 写回 四个阶段各占一个线程，经有界队列流水线执行，
+        Mongo 读写与模型推理互相交叠。
         """
         logger.info("--- [Analysis Task] Starting batch processing ---")
         collection = db.get_collection("social_posts")
         
         processed_count = 0
+        # 多进程执行器 (ANALYSIS_WORKERS > 1 时生效)，每个子进程每轮分到约 batch_size 条；
+        # 进程内共享，多次调用不会重复 fork
+        executor = AnalysisExecutor.shared()
+        fetch_size = batch_size * executor.workers if executor.parallel else batch_size
+        # 内容哈希结果缓存：重复抓取 / 转发的相同文本只查一次库
+        result_cache = NLPResultCache() if settings.NLP_RESULT_CACHE else None
+        # 近似重复索引：洗稿 / 加表情的帖子挂到代表帖上，直接复用代表帖的 NLP 结果；
+        # 先载入最近的代表帖，之前任务里抓到过的原帖也能被认出
+        dedup_index = NearDuplicateIndex() if settings.NEAR_DUP_ENABLED else None
+        if dedup_index:
+            logger.info(f"Near-duplicate index seeded with {dedup_index.seed(collection)} recent canonical posts")
         
         try:
-            query_filter = {"process_status": 0}
-            if task_id:
-                query_filter["task_id"] = str(task_id)
-
-            while True:
-                # 1. 捞取未处理的数据
-                cursor = collection.find(query_filter).limit(batch_size)
-                posts_data = list(cursor)
-                
-                if not posts_data:
-                    break
-                
-                logger.info(f"Processing batch of {len(posts_data)} posts...")
-                
-                for p_data in posts_data:
-                    try:
-                        # 转换成 Pydantic 模型方便操作 (可选，也可以直接用 dict)
-                        # 注意：直接操作 dict 速度更快，这里为了稳健展示 dict 操作
-                        post_id = p_data["_id"]
-                        raw_content = p_data.get("content", "")
-                        
-                        # A. 清洗
-                        clean_content = TextCleaner.clean(raw_content)
-                        if len(clean_content) < 4:
-                            collection.update_one(
-                                {"_id": post_id}, 
-                                {"$set": {"process_status": -1, "note": "内容过短"}}
-                            )
-                            continue
-                            
-                        # B. NLP 处理
-                        keywords = self.nlp.get_keywords(clean_content)
-                        sentiment = self.nlp.get_sentiment(clean_content)
-                        embedding = self.nlp.get_embedding(clean_content)
-                        
-                        # C. 更新数据库
-                        collection.update_one(
-                            {"_id": post_id},
-                            {"$set": {
-                                "clean_content": clean_content,
-                                "keywords": keywords,
-                                "sentiment_score": sentiment,
-                                "embedding": embedding,
-                                "process_status": 1, # 第一阶段完成，等待聚类
-                                "analyzed_time": datetime.now()
-                            }}
-                        )
-                        processed_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing post {p_data.get('_id')}: {e}")
-                        collection.update_one(
-                            {"_id": p_data["_id"]},
-                            {"$set": {"process_status": -1, "error": str(e)}}
-                        )
-                
-                # 简单的流控
-                time.sleep(0.1)
+            queue = PostLeaseQueue(collection, task_id=task_id, worker_id=worker_id)
+
+            def write(updates):
+                nonlocal processed_count
+                processed_count += self._flush_updates(collection, updates)
+
+            pipeline = StagedPipeline(
+                # 1. 领取未处理 (或租约已过期) 的数据
+                source=lambda: queue.claim(fetch_size) or None,
+                stages=[
+                    ("clean", lambda posts: self._clean_batch(executor, dedup_index, queue, posts)),
+                    ("infer", lambda batch: self._infer_batch(executor, result_cache, queue, batch)),
+                    ("write", write),
+                ],
+                queue_size=settings.PIPELINE_QUEUE_SIZE,
+                name="analysis",
+            )
+            pipeline.run()
                 
         finally:
             logger.info(f"--- [Analysis Task] Finished. Processed {processed_count} posts. ---")
+            # 多进程时编码发生在子进程里，父进程的缓存统计没有意义
+            if not executor.parallel:
+                logger.info(f"Embedding cache stats: {self.nlp.embedding_cache.stats()}")
+            if result_cache:
+                logger.info(f"NLP result cache stats: {result_cache.stats()}")
+            if dedup_index:
+                logger.info(f"Near-duplicate posts collapsed: {dedup_index.duplicates}")
+
+    @staticmethod
+    def _clean_batch(executor, dedup_index, queue, posts_data):
+        """
+        清洗 + 近似去重。返回 (updates, 有效帖子, 清洗后文本, 实际送分析的文本, duplicate_of, 指纹)，
+        updates 中已包含内容过短而直接标记失败的帖子。
+        """
+        logger.info(f"[{queue.worker_id}] Processing batch of {len(posts_data)} posts...")
+        updates = []
+
+        # A. 清洗 (内容过短的直接标记失败)
+        valid_posts = []
+        clean_texts = []
+        cleaned = executor.clean_batch([p.get("content", "") for p in posts_data])
+        for p_data, clean_content in zip(posts_data, cleaned):
+            if len(clean_content) < 4:
+                updates.append((queue.lease_filter(p_data), {"process_status": -1, "note": "内容过短"}))
+                continue
+            valid_posts.append(p_data)
+            clean_texts.append(clean_content)
+
+        # B. 近似去重：重复帖改用代表帖文本做分析 (同文本只会分析一次)
+        analysis_texts = list(clean_texts)
+        duplicate_of = [None] * len(valid_posts)
+        fingerprints = [None] * len(valid_posts)
+        if dedup_index:
+            for i, p_data in enumerate(valid_posts):
+                fingerprints[i] = dedup_index.fingerprint(clean_texts[i])
+                if fingerprints[i] is None: continue
+                linked = dedup_index.link(p_data["_id"], clean_texts[i], fingerprints[i])
+                if linked:
+                    duplicate_of[i], analysis_texts[i] = linked
+
+            # 命中的是之前任务的代表帖 (索引里只有指纹)：按 _id 一次取回文本
+            pending = [i for i, cid in enumerate(duplicate_of) if cid is not None and analysis_texts[i] is None]
+            if pending:
+                texts = dedup_index.load_texts(queue.collection, [duplicate_of[i] for i in pending])
+                for i in pending:
+                    if duplicate_of[i] in texts:
+                        analysis_texts[i] = texts[duplicate_of[i]]
+                    else:
+                        # 代表帖已不存在，按普通帖子处理
+                        duplicate_of[i], analysis_texts[i] = None, clean_texts[i]
+
+        return updates, valid_posts, clean_texts, analysis_texts, duplicate_of, fingerprints
+
+    def _infer_batch(self, executor, result_cache, queue, batch):
+        """NLP 推理并生成本批的写回操作"""
+        updates, valid_posts, clean_texts, analysis_texts, duplicate_of, fingerprints = batch
+
+        # 批次可能在队列里排了一阵：推理前先续约，已被别的 worker 接手的帖子不再白算
+        held = queue.renew(valid_posts)
+        if len(held) < len(valid_posts):
+            logger.warning(f"[{queue.worker_id}] {len(valid_posts) - len(held)} posts lost their lease while queued, skipped")
+            keep = [i for i, p in enumerate(valid_posts) if p["_id"] in held]
+            valid_posts, clean_texts, analysis_texts, duplicate_of, fingerprints = (
+                [col[i] for i in keep] for col in (valid_posts, clean_texts, analysis_texts, duplicate_of, fingerprints)
+            )
+
+        # C. NLP 整批处理 (先查结果缓存，关键词 / 情感 / 向量共用一次文档编码)
+        batch_results = self._analyze_texts(executor, result_cache, analysis_texts)
+
+        for p_data, clean_content, canonical_id, fp, result in zip(
+            valid_posts, clean_texts, duplicate_of, fingerprints, batch_results
+        ):
+            try:
+                # 拆分重试后仍失败的帖子
+                if result is None:
+                    raise RuntimeError("NLP 分析失败")
+
+                # D. 更新数据库 (缓存到本批写回)
+                updates.append((queue.lease_filter(p_data), {
+                    "clean_content": clean_content,
+                    "keywords": result["keywords"],
+                    "sentiment_score": result["sentiment"],
+                    "embedding": result["embedding"],
+                    "duplicate_of": canonical_id,
+                    # 过短不参与去重的帖子清掉旧指纹 (重新抓取后内容可能变了)
+                    "simhash": to_int64(fp) if fp is not None else None,
+                    "process_status": 1, # 第一阶段完成，等待聚类
+                    "cluster_pending": True, # 增量聚类据此只处理新分析 / 重新分析的帖子
+                    "analyzed_time": datetime.now()
+                }))
+
+            except Exception as e:
+                logger.error(f"Error processing post {p_data.get('_id')}: {e}")
+                updates.append((queue.lease_filter(p_data), {"process_status": -1, "error": str(e)}))
+
+        return updates
+
+    @staticmethod
+    def _flush_updates(collection, updates) -> int:
+        """
+        updates 为 [(过滤条件, 要 $set 的字段)]，无序 bulk_write 写回整批结果并释放租约，
+        返回成功写入 process_status=1 的条数。
+        过滤条件带 lease_token 与 process_status=2，租约已被其他 worker 接手、
+        或分析途中被重新抓取的帖子不会被覆盖 (计为 lost)。
+        成功结果与失败标记分两次写，各自按 matched 计数，部分写入出错时同样能算出 lost；
+        出错的帖子单独标记为 -1，其余写入照常生效。
+        """
+        if not updates: return 0
+
+        t0 = time.perf_counter()
+        groups = {True: [], False: []}
+        for i, (_, fields) in enumerate(updates):
+            groups[fields.get("process_status") == 1].append(i)
+
+        failed = {}
+        matched = {True: 0, False: 0}
+        for is_success, indexes in groups.items():
+            if not indexes: continue
+            try:
+                result = collection.bulk_write([
+                    UpdateOne(updates[i][0], {"$set": updates[i][1], "$unset": PostLeaseQueue.LEASE_FIELDS})
+                    for i in indexes
+                ], ordered=False)
+                matched[is_success] = result.matched_count
+            except BulkWriteError as e:
+                matched[is_success] = e.details.get("nMatched", 0)
+                for err in e.details.get("writeErrors", []):
+                    failed[indexes[err["index"]]] = err.get("errmsg", "bulk write error")
+
+        if failed:
+            logger.error(f"Bulk write-back: {len(failed)}/{len(updates)} ops failed")
+            try:
+                collection.bulk_write([
+                    UpdateOne(updates[i][0], {"$set": {"process_status": -1, "error": msg}, "$unset": PostLeaseQueue.LEASE_FIELDS})
+                    for i, msg in failed.items()
+                ], ordered=False)
+            except BulkWriteError as e:
+                logger.error(f"Failed to mark failed posts: {e.details.get('writeErrors', [])[:3]}")
+
+        # 既没匹配上也没报错的就是租约已丢失的帖子
+        lost = sum(
+            len(indexes) - matched[is_success] - sum(1 for i in indexes if i in failed)
+            for is_success, indexes in groups.items()
+        )
+        if lost:
+            logger.warning(f"Bulk write-back: {lost} posts skipped, lease lost (reclaimed by another worker or post re-crawled)")
+
+        logger.info(f"Batch write-back: {len(updates)} ops in {time.perf_counter() - t0:.3f}s")
+        return matched[True]
+
+    def _analyze_texts(self, executor, result_cache, texts):
+        """
+        先查结果缓存，未命中的文本去重后整批送模型，新结果写回缓存。
+        整批推理失败时拆成两半经执行器重试 (不在父进程里推理)，单条仍失败的位置返回 None。
+        """
+        results = result_cache.get_many(texts) if result_cache else {}
+        todo = [t for t in dict.fromkeys(texts) if t not in results]
+        if todo:
+            fresh = self._analyze_split(executor, todo)
+            done = [(t, r) for t, r in zip(todo, fresh) if r is not None]
+            results.update(done)
+            if result_cache and done:
+                result_cache.put_many([t for t, _ in done], [r for _, r in done])
+        return [results.get(t) for t in texts]
+
+    def _analyze_split(self, executor, texts):
+        try:
+            return executor.analyze_batch(texts)
+        except Exception as e:
+            if len(texts) == 1:
+                logger.error(f"Analysis failed: {e}")
+                return [None]
+            logger.error(f"Batch analysis failed ({len(texts)} texts), retry in halves: {e}")
+            mid = len(texts) // 2
+            return self._analyze_split(executor, texts[:mid]) + self._analyze_split(executor, texts[mid:])
 
     def run_topic_clustering(self, task_id=None):
         """
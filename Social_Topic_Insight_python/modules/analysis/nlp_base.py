@@ -1,18 +1,89 @@
 import os
 import re
+import sys
+import threading
+import time
+from collections import OrderedDict
 import jieba
 import jieba.posseg as pseg
 import jieba.analyse
 import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
-from transformers import pipeline
 from core.config import settings
+from .trigger_matcher import TriggerLexicon
+
+
+class EmbeddingCache:
+    """
+    向量 LRU 缓存：key 为 (模型名, 归一化文本)，值统一存 float32。
+    按估算的内存占用淘汰最久未使用的条目，max_mb <= 0 表示关闭缓存。
+    """
+    # 每个条目除向量和字符串本身外的大致额外开销 (OrderedDict 节点 + tuple)
+    ENTRY_OVERHEAD = 128
+
+    def __init__(self, max_mb: float):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # 只合并空白：对分词结果无影响，保证缓存命中与直接编码结果一致
+        return " ".join(text.split())
+
+    def _entry_size(self, key, vec) -> int:
+        return vec.nbytes + sys.getsizeof(key[1]) + self.ENTRY_OVERHEAD
+
+    def get(self, key):
+        with self._lock:
+            vec = self._store.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, key, vec):
+        if not self.enabled: return
+        vec = np.asarray(vec, dtype=np.float32)
+        size = self._entry_size(key, vec)
+        if size > self.max_bytes: return
+        with self._lock:
+            old = self._store.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(key, old)
+            self._store[key] = vec
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, old_vec = self._store.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_vec)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._store),
+            "size_mb": round(self._bytes / 1024 / 1024, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_NOT_LOADED = object()
+
 
 class NLPProcessor:
     _instance = None
     
     # === 保持你的原始配置 ===
+    # 触发词以 triggers.txt 为准 (支持热加载)，以下两组仅在词表文件缺失时兜底
     EVENT_TRIGGERS = {
         "污染","排污","垃圾","异味","噪音",
         "关闭","闭馆","停业","封闭",
@@ -31,6 +102,8 @@ class NLPProcessor:
 
     INVALID_POS = {"x", "u", "w", "c", "p", "o"}
 
+    SENTIMENT_MODEL = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -38,37 +111,112 @@ class NLPProcessor:
         return cls._instance
 
     def _initialize(self):
-        print(">>> [NLP Core] Initializing models and dictionaries...")
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        pipe_device = 0 if self.device == "cuda" else -1
-
-        # 1. 加载 Embedding
-        print(f">>> [NLP Core] Loading Embedding: {settings.EMBEDDING_MODEL}")
-        #shibing624/text2vec-base-chinese 把中文句子变成向量
-        self.embedder = SentenceTransformer(settings.EMBEDDING_MODEL, device=self.device) 
-
-        # 2. 加载情感分析
-        sentiment_model = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
-        #情感分析模型,打分（判断是积极、消极还是中性）
-        print(f">>> [NLP Core] Loading Sentiment: {sentiment_model}")
-        try:
-            self.sentiment_pipe = pipeline(
-                "sentiment-analysis",
-                model=sentiment_model,
-                tokenizer=sentiment_model,
-                device=pipe_device,
-                top_k=None
-            )
-        except Exception as e:
-            print(f"!!! Sentiment model failed to load: {e}")
-            self.sentiment_pipe = None
-
-        # 3. Jieba 初始化与字典加载
+        # torch / transformers 等重依赖与模型都推迟到第一次使用 (或 warmup) 时才加载，
+        # 只导入本模块的进程 (如 API 服务) 不会加载 torch
+        print(">>> [NLP Core] Initializing dictionaries (models load on first use)...")
+        self._embedder = None
+        self._sentiment_pipe = _NOT_LOADED
+        self._load_lock = threading.RLock()
+        self._warmup_thread = None
+        self.embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_MB)
+
+        # Jieba 初始化与字典加载
         jieba.initialize()
         self._load_userdicts()
         self._load_stopwords()
+        self._load_triggers()
         print(">>> [NLP Core] Ready.")
 
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._load_lock:
+                if self._embedder is None:
+                    t0 = time.perf_counter()
+                    # shibing624/text2vec-base-chinese 把中文句子变成向量
+                    print(f">>> [NLP Core] Loading Embedding: {settings.EMBEDDING_MODEL} (backend={settings.NLP_BACKEND})")
+                    self._embedder = self._load_embedder()
+                    print(f">>> [NLP Core] Embedding loaded in {time.perf_counter() - t0:.2f}s")
+        return self._embedder
+
+    @property
+    def sentiment_pipe(self):
+        if self._sentiment_pipe is _NOT_LOADED:
+            with self._load_lock:
+                if self._sentiment_pipe is _NOT_LOADED:
+                    t0 = time.perf_counter()
+                    # 情感分析模型,打分（判断是积极、消极还是中性）
+                    print(f">>> [NLP Core] Loading Sentiment: {self.SENTIMENT_MODEL}")
+                    try:
+                        pipe = self._load_sentiment_pipe()
+                        print(f">>> [NLP Core] Sentiment loaded in {time.perf_counter() - t0:.2f}s")
+                    except Exception as e:
+                        print(f"!!! Sentiment model failed to load: {e}")
+                        pipe = None
+                    self._sentiment_pipe = pipe
+        return self._sentiment_pipe
+
+    def warmup(self, background: bool = False):
+        """
+        预加载全部模型。background=True 时在后台线程加载并立即返回该线程，
+        加载期间到达的请求会在模型属性上等待加载完成。
+        """
+        def _load():
+            t0 = time.perf_counter()
+            _ = self.embedder
+            _ = self.sentiment_pipe
+            print(f">>> [NLP Core] Warmup finished in {time.perf_counter() - t0:.2f}s")
+
+        if not background:
+            _load()
+            return None
+        thread = threading.Thread(target=_load, name="nlp-warmup", daemon=True)
+        thread.start()
+        self._warmup_thread = thread
+        return thread
+
+    def wait_warmup(self):
+        """等待后台 warmup 线程结束；fork 子进程前必须调用，不能带着正在加载模型的线程 fork"""
+        thread = self._warmup_thread
+        if thread is not None:
+            thread.join()
+            self._warmup_thread = None
+
+    def _use_onnx(self) -> bool:
+        # 选择 ONNX 后端时完全不导入 torch (ONNX Runtime 只用 CPUExecutionProvider)
+        return settings.NLP_BACKEND == "onnx"
+
+    def _load_embedder(self):
+        if self._use_onnx():
+            try:
+                from .onnx_backend import OnnxEmbedder
+                return OnnxEmbedder()
+            except Exception as e:
+                print(f"!!! ONNX embedder unavailable, fallback to PyTorch: {e}")
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(settings.EMBEDDING_MODEL, device=self._torch_device())
+
+    def _load_sentiment_pipe(self):
+        if self._use_onnx():
+            try:
+                from .onnx_backend import OnnxSentimentPipeline
+                return OnnxSentimentPipeline()
+            except Exception as e:
+                print(f"!!! ONNX sentiment unavailable, fallback to PyTorch: {e}")
+        from transformers import pipeline
+        return pipeline(
+            "sentiment-analysis",
+            model=self.SENTIMENT_MODEL,
+            tokenizer=self.SENTIMENT_MODEL,
+            device=0 if self._torch_device() == "cuda" else -1,
+            top_k=None
+        )
+
+    @staticmethod
+    def _torch_device() -> str:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
     def _load_userdicts(self):
         base_dir = os.path.dirname(__file__)
         user_dict_path = os.path.join(base_dir, "user_dict.txt")
@@ -101,12 +249,23 @@ class NLPProcessor:
         # 你的硬编码补充
         self.stopwords |= {"的","了","在","是","我","有","和","就","不","人","都","一","一个","上","也","很","到","说","去","你","我们","他们","自己","什么","怎么","大家","或者"}
 
-    def _generate_candidates(self, text: str, max_ngram=3):
+    def _load_triggers(self):
+        # 词表文件存在时以文件为准，否则使用上面的内置词表
+        path = settings.TRIGGER_LEXICON_PATH or os.path.join(os.path.dirname(__file__), "triggers.txt")
+        self.triggers = TriggerLexicon(
+            path, self.EVENT_TRIGGERS, self.NEGATIVE_TRIGGERS,
+            reload_interval=settings.TRIGGER_RELOAD_INTERVAL
+        )
+
+    def _generate_candidates(self, text: str, max_ngram=3, max_candidates=None):
         """
         生成候选词：正则强提取 + POS 组合 + N-gram
         【更新】增强了数词与单位/名词的绑定逻辑
+        max_candidates: 候选词上限 (默认取 KEYWORD_MAX_CANDIDATES，0 表示不裁剪)，
+        超出时用 TF-IDF + 词性 + 书名号/话题加权打分，只保留前 N 个送去编码
         """
         candidates = set()
+        parts = {}  # 候选词 -> 组成它的 (词, 词性) 列表，供裁剪打分使用
 
         # --- A. 强规则提取 (书名号、双引号、话题) ---
         titles = re.findall(r'《([^》]+)》', text)
@@ -160,6 +319,7 @@ class NLPProcessor:
             # 执行合并
             if valid_combos and not is_stop:
                 candidates.add(w1.word + w2.word)
+                parts.setdefault(w1.word + w2.word, [(w1.word, w1.flag), (w2.word, w2.flag)])
 
         # 2. Sliding N-grams (N-gram 逻辑保持不变)
         n_len = len(tokens)
@@ -190,13 +350,90 @@ class NLPProcessor:
                 if len(cand) <= 1: continue
                 
                 candidates.add(cand)
+                parts.setdefault(cand, list(zip(seg, seg_flags)))
+
+        # 3. 硬注入白名单事件词 (自动机一次扫描)
+        events = self.triggers.events(text)
+        candidates.update(events)
+
+        candidates = list(candidates)
+        if max_candidates is None:
+            max_candidates = settings.KEYWORD_MAX_CANDIDATES
+        if max_candidates and len(candidates) > max_candidates:
+            candidates = self._prune_candidates(
+                text, candidates, parts, set(titles) | set(hashtags), events, max_candidates
+            )
+        return candidates
 
-        # 3. 硬注入白名单事件词
-        for trig in self.EVENT_TRIGGERS:
-            if trig in text:
-                candidates.add(trig)
+    # 裁剪打分用的词性权重 (按前缀匹配，越靠前越优先)
+    POS_PRIORITY = (
+        ("nr", 1.3), ("ns", 1.3), ("nt", 1.3), ("nz", 1.3),
+        ("n", 1.0), ("vn", 0.9), ("eng", 0.8), ("m", 0.7), ("v", 0.6),
+    )
 
-        return list(candidates)
+    def _pos_weight(self, flag: str) -> float:
+        for prefix, weight in self.POS_PRIORITY:
+            if flag.startswith(prefix): return weight
+        return 0.4
+
+    def _prune_candidates(self, text, candidates, parts, marked, events, max_candidates):
+        """
+        编码前的廉价打分：TF * IDF(jieba 自带 IDF 表) * 词性权重，
+        书名号 / 话题词与事件词额外加权，只保留得分最高的 max_candidates 个。
+        保留下来的候选词维持原有顺序，保证后续排序的稳定性。
+        """
+        tfidf = jieba.analyse.default_tfidf
+        idf_freq, median_idf = tfidf.idf_freq, tfidf.median_idf
+
+        scores = {}
+        for cand in candidates:
+            words = parts.get(cand)
+            if words:
+                idf = sum(idf_freq.get(w, median_idf) for w, _ in words) / len(words)
+                pos = max(self._pos_weight(f) for _, f in words)
+                span = 1.0 + 0.2 * (len(words) - 1)
+            else:
+                idf, pos, span = idf_freq.get(cand, median_idf), 1.0, 1.0
+
+            score = max(text.count(cand), 1) * idf * pos * span
+            if cand in marked: score *= 3.0
+            if cand in events: score *= 2.0
+            scores[cand] = score
+
+        keep = set(sorted(candidates, key=lambda c: scores[c], reverse=True)[:max_candidates])
+        return [c for c in candidates if c in keep]
+
+    def pruning_report(self, texts, top_k: int = 5) -> dict:
+        """
+        对比裁剪前后的关键词结果：候选词数量变化，以及关键词重合度
+        (recall = 裁剪后结果覆盖未裁剪结果的比例，exact = 完全一致的比例)。
+        """
+        n_docs, n_full, n_pruned, n_exact, recall_sum = 0, 0, 0, 0, 0.0
+        for text in texts:
+            if not text or len(text) < 3: continue
+            full = self._generate_candidates(text, max_ngram=3, max_candidates=0)
+            pruned = self._generate_candidates(text, max_ngram=3)
+            if not full: continue
+
+            doc_emb = self.encode_one(text)
+            kw_full = self._select_keywords(text, full, doc_emb, self.encode(full), top_k)
+            kw_pruned = self._select_keywords(text, pruned, doc_emb, self.encode(pruned), top_k)
+
+            n_docs += 1
+            n_full += len(full)
+            n_pruned += len(pruned)
+            n_exact += kw_full == kw_pruned
+            recall_sum += len(set(kw_full) & set(kw_pruned)) / len(kw_full) if kw_full else 1.0
+
+        if not n_docs: return {"docs": 0}
+        return {
+            "docs": n_docs,
+            "max_candidates": settings.KEYWORD_MAX_CANDIDATES,
+            "avg_candidates_full": round(n_full / n_docs, 1),
+            "avg_candidates_pruned": round(n_pruned / n_docs, 1),
+            "keyword_recall": round(recall_sum / n_docs, 4),
+            "exact_match_rate": round(n_exact / n_docs, 4),
+        }
 
     def get_keywords(self, text: str, top_k: int = 5):
         """
@@ -211,27 +448,105 @@ class NLPProcessor:
             tags = jieba.analyse.extract_tags(text, topK=top_k)
             return tags[:top_k]
 
-        doc_emb = self.embedder.encode(text)
-        cand_embs = self.embedder.encode(candidates)
+        doc_emb = self.encode_one(text)
+        cand_embs = self.encode(candidates)
 
-        def cos_sim(a, b):
-            return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        return self._select_keywords(text, candidates, doc_emb, cand_embs, top_k)
 
-        doc_sims = []
-        for i, cand in enumerate(candidates):
-            sim = cos_sim(cand_embs[i], doc_emb)
-            if f"《{cand}》" in text:
-                sim *= 1.5 
-            doc_sims.append((cand, sim, cand_embs[i]))
-        
-        doc_sims.sort(key=lambda x: x[1], reverse=True)
+    def get_keywords_batch(self, texts, top_k: int = 5):
+        """
+        批量版 get_keywords：整批生成候选词并去重，
+        文档与候选词各自一次大批量编码，再逐条做 MMR 筛选。
+        结果与逐条调用 get_keywords 一致，顺序与输入一一对应。
+        """
+        keywords, _ = self._extract_batch(texts, top_k, with_doc_embs=False)
+        return keywords
+
+    def analyze(self, text: str, top_k: int = 5) -> dict:
+        """单条版 analyze_batch"""
+        return self.analyze_batch([text], top_k=top_k)[0]
+
+    def analyze_batch(self, texts, top_k: int = 5):
+        """
+        一次性产出关键词、情感分与文档向量：
+        每条文本只分词一次，文档向量只编码一次，同时用于 MMR 与向量输出。
+        返回与输入顺序一致的 [{"keywords", "sentiment", "embedding"}]。
+        """
+        keywords, doc_embs = self._extract_batch(texts, top_k, with_doc_embs=True)
+        sentiments = self.get_sentiment_batch(texts)
+
+        results = []
+        for i, text in enumerate(texts):
+            results.append({
+                "keywords": keywords[i],
+                "sentiment": sentiments[i],
+                "embedding": doc_embs[i].tolist() if text else [],
+            })
+        return results
+
+    def _extract_batch(self, texts, top_k, with_doc_embs):
+        """
+        关键词批量提取的公共实现。
+        with_doc_embs=True 时为每条输入都编码文档向量并一并返回，
+        否则只编码需要做 MMR 的文档，第二个返回值为 None。
+        """
+        results = [[] for _ in texts]
+
+        pending = []          # (下标, 候选词列表)
+        cand_index = {}       # 候选词 -> 在去重词表中的行号
+        for i, text in enumerate(texts):
+            if not text or len(text) < 3: continue
+
+            candidates = self._generate_candidates(text, max_ngram=3)
+            if not candidates:
+                tags = jieba.analyse.extract_tags(text, topK=top_k)
+                results[i] = tags[:top_k]
+                continue
+
+            pending.append((i, candidates))
+            for cand in candidates:
+                if cand not in cand_index:
+                    cand_index[cand] = len(cand_index)
+
+        all_doc_embs = None
+        if with_doc_embs:
+            all_doc_embs = self.encode([t or "" for t in texts])
+            doc_embs = [all_doc_embs[i] for i, _ in pending]
+        elif pending:
+            doc_embs = self.encode([texts[i] for i, _ in pending])
+
+        if not pending: return results, all_doc_embs
+
+        vocab_embs = self.encode(list(cand_index))
+
+        for (i, candidates), doc_emb in zip(pending, doc_embs):
+            rows = [cand_index[c] for c in candidates]
+            results[i] = self._select_keywords(texts[i], candidates, doc_emb, vocab_embs[rows], top_k)
+
+        return results, all_doc_embs
+
+    def _select_keywords(self, text, candidates, doc_emb, cand_embs, top_k):
+        """按与全文的相似度排序候选词，并做子串 / 语义冗余过滤"""
+        # 候选词与文档统一先归一化，之后的余弦相似度都只是点积
+        cand_embs = np.asarray(cand_embs, dtype=np.float32)
+        cand_units = cand_embs / np.maximum(np.linalg.norm(cand_embs, axis=1, keepdims=True), 1e-12)
+        doc_emb = np.asarray(doc_emb, dtype=np.float32)
+        doc_unit = doc_emb / max(float(np.linalg.norm(doc_emb)), 1e-12)
+
+        doc_sims = cand_units @ doc_unit
+        is_title = np.fromiter((f"《{cand}》" in text for cand in candidates), dtype=bool, count=len(candidates))
+        doc_sims = np.where(is_title, doc_sims * 1.5, doc_sims)
+
+        # 稳定排序，相似度相同时保持候选词原有顺序
+        order = np.argsort(-doc_sims, kind="stable")
 
         final_keywords = []
-        final_embeddings = [] 
+        selected = np.empty((top_k, cand_units.shape[1]), dtype=np.float32)
         
-        for cand, sim, emb in doc_sims:
+        for idx in order:
             if len(final_keywords) >= top_k: break
             
+            cand = candidates[idx]
             if cand in self.stopwords: continue
             if cand.isdigit(): continue
             
@@ -241,48 +556,116 @@ class NLPProcessor:
                     is_substring = True; break
             if is_substring: continue
 
-            is_redundant = False
-            for exist_emb in final_embeddings:
-                redundancy_score = cos_sim(emb, exist_emb)
-                if redundancy_score > 0.89: 
-                    is_redundant = True; break
-            
-            if is_redundant: continue
+            n_selected = len(final_keywords)
+            if n_selected and np.any(selected[:n_selected] @ cand_units[idx] > 0.89):
+                continue
 
+            selected[n_selected] = cand_units[idx]
             final_keywords.append(cand)
-            final_embeddings.append(emb)
 
         return final_keywords
 
     def get_sentiment(self, text: str) -> float:
         """混合情感分析 (保留死线逻辑)"""
-        if not text: return 0.0
+        return self.get_sentiment_batch([text])[0]
 
-        for trigger in self.NEGATIVE_TRIGGERS:
-            if trigger in text:
-                return -0.95
+    def get_sentiment_batch(self, texts, batch_size: int = None):
+        """
+        批量情感分析：命中负面死线词的直接给 -0.95，
+        其余按 token 长度排序分桶，每桶一次 pipeline 调用 (按 token 截断)，
+        结果按输入顺序返回，分数仍为 positive - negative。
+        """
+        batch_size = batch_size or settings.SENTIMENT_BATCH_SIZE
+        scores = [0.0] * len(texts)
 
-        if self.sentiment_pipe is None: return 0.0
-        
+        pending = []
+        for i, text in enumerate(texts):
+            if not text: continue
+            if self.triggers.has_negative(text):
+                scores[i] = -0.95
+                continue
+            pending.append(i)
+
+        if self.sentiment_pipe is None or not pending: return scores
+
+        max_len = settings.SENTIMENT_MAX_TOKENS
         try:
-            results = self.sentiment_pipe(text[:510])[0]
-            if isinstance(results, dict): results = [results]
-            
-            pos_score = 0.0
-            neg_score = 0.0
-            
-            for r in results:
-                label = str(r["label"]).lower()
-                prob = r["score"]
-                if "positive" in label: pos_score = prob
-                elif "negative" in label: neg_score = prob
-            
-            final_score = pos_score - neg_score
-            return round(final_score, 4)
+            token_ids = self.sentiment_pipe.tokenizer(
+                [texts[i] for i in pending], truncation=True, max_length=max_len
+            )["input_ids"]
+            # 长度相近的文本放在同一桶里，减少 padding 浪费
+            order = [pending[j] for j in sorted(range(len(pending)), key=lambda j: len(token_ids[j]))]
         except Exception as e:
-            print(f"Sentiment Error: {e}")
-            return 0.0
+            print(f"Sentiment Tokenize Error: {e}")
+            order = pending
+
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            try:
+                outputs = self.sentiment_pipe(
+                    [texts[i] for i in bucket],
+                    batch_size=batch_size, truncation=True, max_length=max_len
+                )
+            except Exception as e:
+                print(f"Sentiment Error: {e}")
+                continue
+            for i, results in zip(bucket, outputs):
+                scores[i] = self._sentiment_score(results)
+
+        return scores
+
+    @staticmethod
+    def _sentiment_score(results) -> float:
+        if isinstance(results, dict): results = [results]
+
+        pos_score = 0.0
+        neg_score = 0.0
+
+        for r in results:
+            label = str(r["label"]).lower()
+            prob = r["score"]
+            if "positive" in label: pos_score = prob
+            elif "negative" in label: neg_score = prob
+
+        final_score = pos_score - neg_score
+        return round(final_score, 4)
+
+    def encode(self, texts):
+        """
+        带 LRU 缓存的批量编码，返回 (n, dim) 的 float32 矩阵。
+        未命中的文本去重后一次性送入模型。
+        """
+        cache = self.embedding_cache
+        model = settings.EMBEDDING_MODEL
+        keys = [(model, EmbeddingCache.normalize(t)) for t in texts]
+
+        vectors = [None] * len(keys)
+        missing = {}  # 未命中的 key -> 在输入中的下标列表
+        for i, key in enumerate(keys):
+            vec = cache.get(key) if cache.enabled else None
+            if vec is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                vectors[i] = vec
+
+        if missing:
+            miss_keys = list(missing)
+            embs = self.embedder.encode(
+                [k[1] for k in miss_keys], batch_size=settings.EMBEDDING_BATCH_SIZE
+            )
+            embs = np.asarray(embs, dtype=np.float32)
+            for key, emb in zip(miss_keys, embs):
+                cache.put(key, emb)
+                for i in missing[key]:
+                    vectors[i] = emb
+
+        if not vectors:
+            return np.zeros((0, self.embedder.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(vectors)
+
+    def encode_one(self, text: str):
+        return self.encode([text])[0]
 
     def get_embedding(self, text: str):
         if not text: return []
-        return self.embedder.encode(text).tolist()
\ No newline at end of file
+        return self.encode_one(text).tolist()
\ No newline at end of file
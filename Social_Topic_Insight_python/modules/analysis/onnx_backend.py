@@ -0,0 +1,211 @@
+"""
+ONNX Runtime 推理后端 (NLP_BACKEND=onnx)。
+
+- export_models(): 用 optimum 把向量模型与情感模型导出为 ONNX，可选动态 int8 量化
+- OnnxEmbedder / OnnxSentimentPipeline: 运行期只依赖 onnxruntime + transformers 分词器，
+  接口分别与 SentenceTransformer.encode / transformers pipeline 保持一致
+- parity_check(): 与 PyTorch 输出对比 (向量余弦一致性、情感正负号一致性)
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from core.config import PROJECT_ROOT, settings
+
+EMBEDDING_SUBDIR = "embedding"
+SENTIMENT_SUBDIR = "sentiment"
+META_FILE = "st_config.json"
+
+
+def model_dir(subdir: str) -> str:
+    base = settings.ONNX_MODEL_DIR or os.path.join(PROJECT_ROOT, "onnx_models")
+    return os.path.join(base, subdir)
+
+
+def _create_session(path: str, quantized: bool):
+    import onnxruntime as ort
+
+    fname = "model_quantized.onnx" if quantized else "model.onnx"
+    model_path = os.path.join(path, fname)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"{model_path} not found, run scripts/onnx_backend.py export first")
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if settings.ONNX_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+    return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+
+def _feeds(session, encoded) -> dict:
+    names = {i.name for i in session.get_inputs()}
+    return {k: np.asarray(v, dtype=np.int64) for k, v in encoded.items() if k in names}
+
+
+class OnnxEmbedder:
+    """SentenceTransformer.encode 的 ONNX 实现 (mean pooling，与 text2vec 一致)"""
+
+    def __init__(self, path: str = None, quantized: bool = None):
+        from transformers import AutoTokenizer
+
+        path = path or model_dir(EMBEDDING_SUBDIR)
+        quantized = settings.ONNX_QUANTIZE if quantized is None else quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.session = _create_session(path, quantized)
+
+        meta = {}
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.max_seq_length = int(meta.get("max_seq_length") or 128)
+        self._dim = int(meta.get("dimension") or 0)
+
+        outputs = [o.name for o in self.session.get_outputs()]
+        self._output = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if not self._dim:
+            self._dim = int(self.encode(["维度"]).shape[1])
+        return self._dim
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        # 与 SentenceTransformer 一样按长度排序后分批，减少 padding
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        out = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in idx], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            hidden = self.session.run([self._output], _feeds(self.session, enc))[0]
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            for i, vec in zip(idx, pooled.astype(np.float32)):
+                out[i] = vec
+
+        if single: return out[0]
+        if not out: return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(out)
+
+
+class OnnxSentimentPipeline:
+    """transformers sentiment-analysis pipeline (top_k=None) 的 ONNX 实现"""
+
+    def __init__(self, path: str = None, quantized: bool = None):
+        from transformers import AutoConfig, AutoTokenizer
+
+        path = path or model_dir(SENTIMENT_SUBDIR)
+        quantized = settings.ONNX_QUANTIZE if quantized is None else quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.session = _create_session(path, quantized)
+        self.id2label = AutoConfig.from_pretrained(path).id2label
+
+    def __call__(self, texts, batch_size: int = 32, truncation: bool = True, max_length: int = 512, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+
+        results = []
+        for start in range(0, len(texts), batch_size):
+            enc = self.tokenizer(
+                texts[start:start + batch_size], padding=True,
+                truncation=truncation, max_length=max_length, return_tensors="np"
+            )
+            logits = self.session.run(None, _feeds(self.session, enc))[0]
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            for row in probs:
+                ranked = sorted(enumerate(row.tolist()), key=lambda x: x[1], reverse=True)
+                results.append([{"label": self.id2label[i], "score": p} for i, p in ranked])
+        return results
+
+
+def export_models(quantize: bool = True, sentiment_model: str = None):
+    """导出 ONNX 模型 (需要 optimum[onnxruntime])，quantize=True 时额外生成动态 int8 版本"""
+    from optimum.exporters.onnx import main_export
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoTokenizer
+
+    from .nlp_base import NLPProcessor
+
+    sentiment_model = sentiment_model or NLPProcessor.SENTIMENT_MODEL
+    jobs = [
+        (settings.EMBEDDING_MODEL, model_dir(EMBEDDING_SUBDIR), "feature-extraction"),
+        (sentiment_model, model_dir(SENTIMENT_SUBDIR), "text-classification"),
+    ]
+    for name, out_dir, task in jobs:
+        print(f">>> [ONNX] Exporting {name} -> {out_dir}")
+        main_export(name, output=out_dir, task=task, library_name="transformers")
+        AutoTokenizer.from_pretrained(name).save_pretrained(out_dir)
+
+        if quantize:
+            print(f">>> [ONNX] Quantizing (dynamic int8) {out_dir}")
+            quantizer = ORTQuantizer.from_pretrained(out_dir, file_name="model.onnx")
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+
+    # 记录 SentenceTransformer 的截断长度与维度，保证 ONNX 侧编码行为一致
+    st_model = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+    meta = {
+        "model": settings.EMBEDDING_MODEL,
+        "max_seq_length": st_model.max_seq_length,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+    }
+    with open(os.path.join(model_dir(EMBEDDING_SUBDIR), META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def parity_check(texts, quantized: bool = None) -> dict:
+    """对比 PyTorch 与 ONNX 的输出：逐条向量余弦、情感分正负号一致率与耗时"""
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+
+    from .nlp_base import NLPProcessor
+
+    quantized = settings.ONNX_QUANTIZE if quantized is None else quantized
+    texts = [t for t in texts if t]
+    if not texts: return {"texts": 0}
+
+    max_len = settings.SENTIMENT_MAX_TOKENS
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+
+    ref_embedder = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+    ref_pipe = pipeline(
+        "sentiment-analysis", model=NLPProcessor.SENTIMENT_MODEL,
+        tokenizer=NLPProcessor.SENTIMENT_MODEL, device=-1, top_k=None
+    )
+    onnx_embedder = OnnxEmbedder(quantized=quantized)
+    onnx_pipe = OnnxSentimentPipeline(quantized=quantized)
+
+    t0 = time.perf_counter()
+    ref_embs = ref_embedder.encode(texts, batch_size=batch_size)
+    ref_sent = [NLPProcessor._sentiment_score(r) for r in ref_pipe(texts, batch_size=batch_size, truncation=True, max_length=max_len)]
+    t1 = time.perf_counter()
+    onnx_embs = onnx_embedder.encode(texts, batch_size=batch_size)
+    onnx_sent = [NLPProcessor._sentiment_score(r) for r in onnx_pipe(texts, batch_size=batch_size, truncation=True, max_length=max_len)]
+    t2 = time.perf_counter()
+
+    a = ref_embs / np.maximum(np.linalg.norm(ref_embs, axis=1, keepdims=True), 1e-12)
+    b = onnx_embs / np.maximum(np.linalg.norm(onnx_embs, axis=1, keepdims=True), 1e-12)
+    cos = (a * b).sum(axis=1)
+    ref_sent, onnx_sent = np.array(ref_sent), np.array(onnx_sent)
+
+    return {
+        "texts": len(texts),
+        "quantized": quantized,
+        "cosine_mean": round(float(cos.mean()), 5),
+        "cosine_min": round(float(cos.min()), 5),
+        "sentiment_sign_agreement": round(float((np.sign(ref_sent) == np.sign(onnx_sent)).mean()), 4),
+        "sentiment_mae": round(float(np.abs(ref_sent - onnx_sent).mean()), 4),
+        "torch_sec": round(t1 - t0, 3),
+        "onnx_sec": round(t2 - t1, 3),
+    }
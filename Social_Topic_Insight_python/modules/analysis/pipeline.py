@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+
+from core.logger import logger
+
+_DONE = object()
+
+
+class _Stage:
+    def __init__(self, name: str, fn, inbox, outbox):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.items = 0
+        self.busy = 0.0
+        self.thread = None
+
+
+class StagedPipeline:
+    """
+    线程化的流水线：source 产出批次，依次流经各 stage，阶段之间用有界队列衔接。
+
+    - source(): 返回下一批数据，返回 None 表示数据取完
+    - stages: [(名称, fn)]，fn 接收上一阶段的输出并返回交给下一阶段的数据，最后一个阶段的返回值被丢弃
+    队列有界 (queue_size)，下游处理不过来时上游自然阻塞，Mongo I/O 与模型推理可以交叠进行。
+    任一阶段抛异常时整条流水线停止，异常在 run() 中重新抛出。
+    """
+
+    def __init__(self, source, stages, queue_size: int = 2, log_interval: float = 10.0, name: str = "pipeline"):
+        self.name = name
+        self.log_interval = log_interval
+        self._stop = threading.Event()
+        self._errors = []
+
+        self.queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.stages = [_Stage("read", source, None, self.queues[0])]
+        for i, (stage_name, fn) in enumerate(stages):
+            outbox = self.queues[i + 1] if i + 1 < len(stages) else None
+            self.stages.append(_Stage(stage_name, fn, self.queues[i], outbox))
+
+    def _put(self, q, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, stage: _Stage):
+        try:
+            while not self._stop.is_set():
+                if stage.inbox is None:
+                    t0 = time.perf_counter()
+                    item = stage.fn()
+                    stage.busy += time.perf_counter() - t0
+                    if item is None: break
+                else:
+                    item = self._get(stage.inbox)
+                    if item is _DONE: break
+                    t0 = time.perf_counter()
+                    item = stage.fn(item)
+                    stage.busy += time.perf_counter() - t0
+                stage.items += 1
+                if stage.outbox is not None and not self._put(stage.outbox, item):
+                    break
+        except Exception as e:
+            logger.exception(f"[{self.name}] stage '{stage.name}' failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            if stage.outbox is not None:
+                self._put(stage.outbox, _DONE)
+
+    def run(self):
+        start = time.perf_counter()
+        for stage in self.stages:
+            stage.thread = threading.Thread(
+                target=self._run_stage, args=(stage,), name=f"{self.name}-{stage.name}", daemon=True
+            )
+            stage.thread.start()
+
+        next_log = start + self.log_interval
+        for stage in self.stages:
+            while stage.thread.is_alive():
+                stage.thread.join(timeout=0.5)
+                if time.perf_counter() >= next_log:
+                    self._log_progress(time.perf_counter() - start)
+                    next_log += self.log_interval
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"[{self.name}] finished in {elapsed:.2f}s, stages: {self.stats(elapsed)}")
+        if self._errors:
+            raise self._errors[0]
+
+    def _log_progress(self, elapsed: float):
+        depths = {s.name: s.inbox.qsize() for s in self.stages if s.inbox is not None}
+        logger.info(f"[{self.name}] queue depths: {depths}, stages: {self.stats(elapsed)}")
+
+    def stats(self, elapsed: float) -> dict:
+        """各阶段处理的批数与利用率 (忙碌时间 / 总时长)"""
+        return {
+            s.name: {"batches": s.items, "busy_s": round(s.busy, 3), "util": round(s.busy / elapsed, 3) if elapsed else 0.0}
+            for s in self.stages
+        }
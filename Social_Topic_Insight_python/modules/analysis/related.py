@@ -0,0 +1,105 @@
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from core.config import settings
+from core.logger import logger
+
+
+def _block_rows(n: int) -> int:
+    """Query rows per block so the similarity block and its argpartition temporaries stay within RELATED_BLOCK_MB."""
+    # Per candidate: float32 similarity + float32 negated copy + int64 partition index.
+    return max(1, int(settings.RELATED_BLOCK_MB * 1024 * 1024 // (16 * max(n, 1))))
+
+
+def top_k_similar(vectors: np.ndarray, k: int, rows=None):
+    """
+    Exact top-k cosine neighbours of vectors[rows] (default: every row) among all rows,
+    never returning a row as its own neighbour. Rows must be L2-normalised.
+    Blocked matmul + argpartition: memory is O(block * n), not O(n^2).
+    Returns (neighbours, similarities), each (len(rows), k), padded with -1 / -inf.
+    """
+    n = len(vectors)
+    rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    neighbours = np.full((len(rows), k), -1, np.int64)
+    sims = np.full((len(rows), k), -np.inf, np.float32)
+    kk = min(k, n - 1)
+    if kk <= 0 or not len(rows):
+        return neighbours, sims
+
+    step = _block_rows(n)
+    for start in range(0, len(rows), step):
+        query = rows[start:start + step]
+        S = vectors[query] @ vectors.T
+        S[np.arange(len(query)), query] = -np.inf
+        top = np.argpartition(-S, kk - 1, axis=1)[:, :kk]
+        top_sims = np.take_along_axis(S, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        neighbours[start:start + len(query), :kk] = np.take_along_axis(top, order, axis=1)
+        sims[start:start + len(query), :kk] = np.take_along_axis(top_sims, order, axis=1)
+    return neighbours, sims
+
+
+def _ann_top_k(vectors: np.ndarray, k: int):
+    """Approximate all-rows top-k via faiss or hnswlib (inner product); None if neither is installed."""
+    n, dim = vectors.shape
+    X = np.ascontiguousarray(vectors, dtype=np.float32)
+    try:
+        import faiss
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = max(64, 2 * (k + 1))
+        index.add(X)
+        sims, neighbours = index.search(X, k + 1)
+        backend = "faiss"
+    except ImportError:
+        try:
+            import hnswlib
+        except ImportError:
+            return None
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=n, ef_construction=200, M=32, random_seed=0)
+        index.add_items(X, np.arange(n))
+        index.set_ef(max(64, 2 * (k + 1)))
+        neighbours, distances = index.knn_query(X, k=k + 1)
+        sims = 1.0 - distances
+        backend = "hnswlib"
+
+    # Drop each row itself from its own result list.
+    neighbours = neighbours.astype(np.int64)
+    keep = neighbours != np.arange(n)[:, None]
+    out_n = np.full((n, k), -1, np.int64)
+    out_s = np.full((n, k), -np.inf, np.float32)
+    for i in range(n):
+        row_n, row_s = neighbours[i][keep[i]][:k], sims[i][keep[i]][:k]
+        valid = row_n >= 0
+        out_n[i, :valid.sum()] = row_n[valid]
+        out_s[i, :valid.sum()] = row_s[valid]
+    logger.info(f"Related topics via {backend} ANN index: topics={n}")
+    return out_n, out_s
+
+
+def related_topics(vectors: np.ndarray, k: int = None, min_similarity: float = None) -> List[List[Tuple[int, float]]]:
+    """
+    For every row, up to k (row index, cosine similarity) pairs of the most similar other rows
+    with similarity >= min_similarity, most similar first. Above RELATED_ANN_MIN_TOPICS rows an
+    ANN index is used when faiss or hnswlib is installed; otherwise the exact blocked search.
+    """
+    k = settings.RELATED_TOP_K if k is None else k
+    min_similarity = settings.RELATED_MIN_SIMILARITY if min_similarity is None else min_similarity
+    n = len(vectors)
+    if k <= 0 or n < 2:
+        return [[] for _ in range(n)]
+
+    t0 = time.perf_counter()
+    result = _ann_top_k(vectors, k) if n >= settings.RELATED_ANN_MIN_TOPICS else None
+    neighbours, sims = result if result is not None else top_k_similar(vectors, k)
+    logger.info(f"Related topics: topics={n}, k={k}, {time.perf_counter() - t0:.2f}s")
+    return to_pairs(neighbours, sims, min_similarity)
+
+
+def to_pairs(neighbours: np.ndarray, sims: np.ndarray, min_similarity: float) -> List[List[Tuple[int, float]]]:
+    return [
+        [(int(j), round(float(s), 4)) for j, s in zip(row_n, row_s) if j >= 0 and s >= min_similarity]
+        for row_n, row_s in zip(neighbours, sims)
+    ]
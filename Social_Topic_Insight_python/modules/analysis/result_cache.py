@@ -0,0 +1,106 @@
+import hashlib
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from core.config import settings
+from core.database import db
+from core.logger import logger
+from .nlp_base import NLPProcessor
+
+
+class NLPResultCache:
+    """
+    NLP 结果持久化缓存 (Mongo 集合 nlp_result_cache)。
+
+    _id = sha1(模型版本 + 清洗后文本)，存关键词、情感分与向量。
+    转发 / 重复抓取的帖子内容不变时只需一次查询，不再跑模型；
+    模型、后端或关键词参数变化时版本号随之改变，旧结果自然失效。
+    """
+
+    COLLECTION = "nlp_result_cache"
+
+    def __init__(self):
+        self.collection = db.get_collection(self.COLLECTION)
+        self.version = self.model_version()
+        self.hits = 0
+        self.misses = 0
+        if settings.NLP_RESULT_CACHE_TTL_DAYS > 0:
+            try:
+                self.collection.create_index(
+                    "last_used", expireAfterSeconds=int(settings.NLP_RESULT_CACHE_TTL_DAYS * 86400)
+                )
+            except Exception as e:
+                logger.warning(f"NLP result cache index creation warning: {e}")
+
+    @staticmethod
+    def model_version() -> str:
+        parts = [
+            settings.EMBEDDING_MODEL,
+            NLPProcessor.SENTIMENT_MODEL,
+            settings.NLP_BACKEND,
+            "int8" if settings.NLP_BACKEND == "onnx" and settings.ONNX_QUANTIZE else "fp32",
+            f"cand{settings.KEYWORD_MAX_CANDIDATES}",
+            settings.NLP_RESULT_CACHE_VERSION,
+        ]
+        return "|".join(str(p) for p in parts)
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.version}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts) -> dict:
+        """返回 {文本: 结果}，只包含命中的文本"""
+        keys = {self.key(t): t for t in set(texts)}
+        found = {}
+        if keys:
+            cursor = self.collection.find(
+                {"_id": {"$in": list(keys)}},
+                {"keywords": 1, "sentiment": 1, "embedding": 1},
+            )
+            for doc in cursor:
+                found[keys[doc["_id"]]] = {
+                    "keywords": doc.get("keywords") or [],
+                    "sentiment": doc.get("sentiment", 0.0),
+                    "embedding": doc.get("embedding") or [],
+                }
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        if found:
+            # 刷新命中条目的使用时间，避免被 TTL 清理
+            self.collection.update_many(
+                {"_id": {"$in": [self.key(t) for t in found]}},
+                {"$set": {"last_used": datetime.now()}},
+            )
+        return found
+
+    def put_many(self, texts, results):
+        now = datetime.now()
+        ops = {}
+        for text, result in zip(texts, results):
+            key = self.key(text)
+            ops[key] = UpdateOne(
+                {"_id": key},
+                {"$set": {
+                    "version": self.version,
+                    "keywords": result["keywords"],
+                    "sentiment": result["sentiment"],
+                    "embedding": result["embedding"],
+                    "last_used": now,
+                }},
+                upsert=True,
+            )
+        if not ops: return
+        try:
+            self.collection.bulk_write(list(ops.values()), ordered=False)
+        except Exception as e:
+            # 缓存写失败不影响主流程
+            logger.warning(f"NLP result cache write failed: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from core.database import db
+from models.trend import TopicTrendRollup
+
+ROLLUP_COLLECTION = "topic_trend_rollups"
+GRANULARITIES = ("minute", "hour", "day")
+ROLLUP_INDEXES = [
+    ([("topic_ref_id", 1), ("granularity", 1), ("bucket_start", 1)], {"unique": True}),
+]
+WRITE_CHUNK = 5000
+
+
+def bucket_start(t: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return t.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return t.replace(minute=0, second=0, microsecond=0)
+    return t.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_doc(topic_ref_id, granularity: str, start: datetime, values, task_value) -> dict:
+    heat, count, sent_sum, sent_count = values[:4]
+    rollup = TopicTrendRollup(
+        topic_ref_id=topic_ref_id,
+        granularity=granularity,
+        bucket_start=start,
+        heat_value=int(heat),
+        post_count=int(count),
+        sent_sum=float(sent_sum),
+        sent_count=int(sent_count),
+    )
+    doc = rollup.model_dump(by_alias=True, exclude={"id"})
+    doc["topic_ref_id"] = topic_ref_id
+    doc["task_id"] = task_value
+    return doc
+
+
+def accumulator_rollups(topic_ref_id, acc, task_value):
+    """Rollup documents for one TopicAccumulator (full rebuild); day buckets are summed from the hours."""
+    for start, values in acc.minutes.items():
+        yield rollup_doc(topic_ref_id, "minute", start, values, task_value)
+    days = {}
+    for start, values in acc.trend.items():
+        yield rollup_doc(topic_ref_id, "hour", start, values, task_value)
+        day = days.setdefault(bucket_start(start, "day"), [0, 0, 0.0, 0])
+        for i in range(4):
+            day[i] += values[i]
+    for start, values in days.items():
+        yield rollup_doc(topic_ref_id, "day", start, values, task_value)
+
+
+class RollupWriter:
+    """
+    Signed per-bucket deltas for topic_trend_rollups, buffered by (topic, granularity, bucket)
+    and written as unordered `$inc` upserts. Buckets whose post_count drops to zero (posts
+    moving out after re-analysis) are removed on flush.
+    """
+
+    def __init__(self):
+        self.collection = db.get_collection(ROLLUP_COLLECTION)
+        self.pending = defaultdict(lambda: [0, 0, 0.0, 0])
+
+    def ensure_indexes(self):
+        for keys, options in ROLLUP_INDEXES:
+            self.collection.create_index(keys, **options)
+
+    def add(self, topic_ref_id, event_time: datetime, heat: int, sent=None, sign: int = 1):
+        for granularity in GRANULARITIES:
+            self._add((topic_ref_id, granularity, bucket_start(event_time, granularity)), heat, 1, sent, sign)
+
+    def _add(self, key, heat, count, sent, sign, sent_count=1):
+        d = self.pending[key]
+        d[0] += sign * heat
+        d[1] += sign * count
+        if sent is not None:
+            d[2] += sign * sent
+            d[3] += sign * sent_count
+
+    def flush(self, task_value=None):
+        ops, shrunk = [], set()
+        for (topic_ref_id, granularity, start), (heat, count, sent_sum, sent_count) in self.pending.items():
+            if not (heat or count or sent_sum or sent_count):
+                continue
+            ops.append(UpdateOne(
+                {"topic_ref_id": topic_ref_id, "granularity": granularity, "bucket_start": start},
+                {"$inc": {"heat_value": int(heat), "post_count": count, "sent_sum": sent_sum, "sent_count": sent_count},
+                 "$set": {"task_id": task_value}},
+                upsert=True,
+            ))
+            if count < 0:
+                shrunk.add(topic_ref_id)
+        self.pending.clear()
+        for i in range(0, len(ops), WRITE_CHUNK):
+            self.collection.bulk_write(ops[i:i + WRITE_CHUNK], ordered=False)
+        if shrunk:
+            self.collection.delete_many({"topic_ref_id": {"$in": list(shrunk)}, "post_count": {"$lte": 0}})
+
+    def move(self, sources, target, task_value=None):
+        """Fold the rollups of merged-away topics into the surviving topic."""
+        for doc in self.collection.find({"topic_ref_id": {"$in": list(sources)}}):
+            self._add(
+                (target, doc["granularity"], doc["bucket_start"]),
+                doc.get("heat_value", 0), doc.get("post_count", 0),
+                doc.get("sent_sum", 0.0), 1, sent_count=doc.get("sent_count", 0),
+            )
+        self.drop(sources)
+        self.flush(task_value)
+
+    def drop(self, topic_ids):
+        self.collection.delete_many({"topic_ref_id": {"$in": list(topic_ids)}})
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from core.database import db
+from core.logger import logger
+
+STAGING_MARK = "__staging_"
+# Staging collections older than this are leftovers of crashed rebuilds.
+STALE_AFTER = timedelta(hours=6)
+
+
+class CollectionSnapshot:
+    """
+    Build a complete new version of a collection off to the side, then swap it in.
+
+    Documents go into `<name>__staging_<ObjectId>` with batched insert_many, or are written to
+    `collection` directly (call ensure_indexes() first if those writes look documents up).
+    publish() builds the indexes and renames the staging collection over the live one
+    (dropTarget), so readers see either the previous snapshot or the new one, never an empty
+    or half-built collection.
+    Note: renameCollection is not supported for sharded collections.
+    """
+
+    def __init__(self, name: str, indexes=(), chunk_size: int = 1000):
+        self.name = name
+        self.indexes = indexes
+        self.chunk_size = chunk_size
+        self.staging_name = f"{name}{STAGING_MARK}{ObjectId()}"
+        self.collection = db.get_collection(self.staging_name)
+        self.count = 0
+        self._buffer = []
+        self._drop_stale()
+
+    def _drop_stale(self):
+        prefix = f"{self.name}{STAGING_MARK}"
+        cutoff = datetime.now().astimezone() - STALE_AFTER
+        for coll_name in db.db.list_collection_names(filter={"name": {"$regex": f"^{prefix}"}}):
+            suffix = coll_name[len(prefix):]
+            if ObjectId.is_valid(suffix) and ObjectId(suffix).generation_time < cutoff:
+                logger.info(f"Dropping stale staging collection {coll_name}")
+                db.db.drop_collection(coll_name)
+
+    def insert(self, doc: dict):
+        self._buffer.append(doc)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.collection.insert_many(self._buffer, ordered=False)
+            self.count += len(self._buffer)
+            self._buffer = []
+
+    def ensure_indexes(self):
+        for keys, options in self.indexes:
+            self.collection.create_index(keys, **options)
+
+    def publish(self):
+        self.flush()
+        # Direct writes bypass the buffer, so fall back to the staging collection's own count.
+        count = self.count or self.collection.estimated_document_count()
+        if not count:
+            # An empty snapshot: nothing to swap in, just empty the live collection.
+            self.discard()
+            db.get_collection(self.name).delete_many({})
+            logger.info(f"Snapshot published: {self.name} (empty)")
+            return
+        self.ensure_indexes()
+        self.collection.rename(self.name, dropTarget=True)
+        logger.info(f"Snapshot published: {self.name} ({count} docs)")
+
+    def discard(self):
+        self._buffer = []
+        db.db.drop_collection(self.staging_name)
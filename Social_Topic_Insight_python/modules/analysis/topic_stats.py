@@ -0,0 +1,221 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import UpdateMany
+
+from core.logger import logger
+from .clustering import BACKFILL_CHUNK, REP_DOC_LIMIT, TopicAccumulator
+
+# Fields the topic key pass reads; everything else is reduced inside Mongo.
+KEY_PROJECTION = {"keywords": 1, "clean_content": 1, "topic_key": 1}
+
+
+def _metric(name: str) -> dict:
+    # Same coercion as int(metrics.get(name, 0) or 0): missing / null / unparsable count as 0.
+    return {"$convert": {"input": f"$metrics.{name}", "to": "long", "onError": 0, "onNull": 0}}
+
+
+# ClusterEngine._calc_heat: likes*3 + comments*5 + shares*8 + floor(sqrt(max(views, 0))), at least 1.
+HEAT_EXPR = {"$max": [
+    {"$add": [
+        {"$multiply": [_metric("likes"), 3]},
+        {"$multiply": [_metric("comments"), 5]},
+        {"$multiply": [_metric("shares"), 8]},
+        {"$floor": {"$sqrt": {"$max": [_metric("views"), 0]}}},
+    ]},
+    1,
+]}
+
+SENT_COUNT_EXPR = {"$cond": [{"$isNumber": "$sentiment_score"}, 1, 0]}
+
+
+def _event_time_expr(now: datetime) -> dict:
+    """ClusterEngine._safe_publish_time: crawl_time, then publish_time, then the run's `now`."""
+    return {"$cond": [
+        {"$eq": [{"$type": "$crawl_time"}, "date"]}, "$crawl_time",
+        {"$cond": [{"$eq": [{"$type": "$publish_time"}, "date"]}, "$publish_time", {"$literal": now}]},
+    ]}
+
+
+class MongoTopicStats:
+    """
+    Topic statistics computed by aggregation pipelines (CLUSTER_STATS_BACKEND=mongo).
+
+    Python only decides the topic of each post: a lightweight pass writes `topic_key` onto
+    social_posts (skipping posts whose key is unchanged). Heat, sentiment, time range,
+    keywords, geo, representative docs and hour / minute trend buckets are then reduced
+    server-side with `$group` (allowDiskUse), so only one small document per topic / trend
+    bucket comes back.
+    The result is the same {topic_key: TopicAccumulator} mapping the Python path builds,
+    minus the packed post ids: the topic_ref_id backfill goes by topic_key instead.
+    Keyword and geo counts come back in full, one row per (topic, term), because the
+    layout and related_topics read whole keyword profiles, not just the top terms.
+    Topics and terms are inserted in first-seen order (by post _id, then keyword position),
+    which is the insertion order of the Python path's _id-sorted pass, so count ties in the
+    top-10 keyword / geo lists and heat ties between topics resolve identically.
+    Embedding centroids of keyword topics are summed in the key pass when the cursor carries
+    `embedding`, since Mongo has no element-wise array sum.
+    Requires MongoDB 5.2+ ($firstN / $dateTrunc).
+    """
+
+    def __init__(self, collection):
+        self.posts = collection
+        # topic_key -> TopicAccumulator holding only emb_sum / emb_count
+        self.embeddings = defaultdict(TopicAccumulator)
+        # Serves the per-topic topic_ref_id backfill.
+        self.posts.create_index([("topic_key", 1)])
+
+    def assign_keys(self, cursor, key_fn) -> int:
+        """Write topic_key for every post of the cursor; returns the number of posts seen."""
+        t0 = time.perf_counter()
+        pending = defaultdict(list)
+        total = changed = buffered = 0
+        for post in cursor:
+            total += 1
+            key = key_fn(post)
+            if post.get("embedding"):
+                self.embeddings[key].add_embedding(post["embedding"])
+            if post.get("topic_key") == key:
+                continue
+            pending[key].append(post["_id"])
+            changed += 1
+            buffered += 1
+            if buffered >= BACKFILL_CHUNK:
+                self._write_keys(pending)
+                pending, buffered = defaultdict(list), 0
+        self._write_keys(pending)
+        logger.info(f"Topic keys assigned: posts={total}, changed={changed}, {time.perf_counter() - t0:.2f}s")
+        return total
+
+    def _write_keys(self, pending):
+        if pending:
+            self.posts.bulk_write(
+                [UpdateMany({"_id": {"$in": ids}}, {"$set": {"topic_key": key}}) for key, ids in pending.items()],
+                ordered=False,
+            )
+
+    def _aggregate(self, pipeline):
+        return self.posts.aggregate(pipeline, allowDiskUse=True, batchSize=2000)
+
+    def collect(self, query_filter: dict, now: datetime):
+        """Run the per-topic pipelines; returns (groups, total_posts)."""
+        t0 = time.perf_counter()
+        match = {"$match": {**query_filter, "topic_key": {"$type": "string"}}}
+        event_time = _event_time_expr(now)
+        groups = defaultdict(TopicAccumulator)
+        total = 0
+
+        for doc in self._aggregate([
+            match,
+            {"$group": {
+                "_id": "$topic_key",
+                "post_count": {"$sum": 1},
+                "heat": {"$sum": HEAT_EXPR},
+                "sent_sum": {"$sum": "$sentiment_score"},
+                "sent_count": {"$sum": SENT_COUNT_EXPR},
+                "min_time": {"$min": event_time},
+                "max_time": {"$max": event_time},
+                "first": {"$min": "$_id"},
+            }},
+            {"$sort": {"first": 1}},
+        ]):
+            acc = groups[doc["_id"]]
+            acc.post_count = doc["post_count"]
+            acc.heat = int(doc["heat"])
+            acc.sent_sum = float(doc["sent_sum"])
+            acc.sent_count = doc["sent_count"]
+            acc.min_time = doc["min_time"]
+            acc.max_time = doc["max_time"]
+            vectors = self.embeddings.get(doc["_id"])
+            if vectors is not None:
+                acc.emb_sum, acc.emb_count = vectors.emb_sum, vectors.emb_count
+            total += acc.post_count
+
+        # Representative docs: first non-duplicate, non-blank texts in _id order.
+        for doc in self._aggregate([
+            match,
+            {"$match": {"duplicate_of": {"$in": [None, ""]}, "clean_content": {"$regex": r"\S"}}},
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": "$topic_key", "docs": {"$firstN": {
+                "input": {"$substrCP": [{"$trim": {"input": "$clean_content"}}, 0, 200]},
+                "n": REP_DOC_LIMIT,
+            }}}},
+        ]):
+            if doc["_id"] in groups:
+                groups[doc["_id"]].rep_docs = doc["docs"]
+
+        for doc in self._aggregate([
+            match,
+            {"$unwind": {"path": "$keywords", "includeArrayIndex": "pos"}},
+            {"$match": {"keywords": {"$type": "string"}}},
+            {"$group": {
+                "_id": {"topic": "$topic_key", "term": {"$trim": {"input": "$keywords"}}},
+                "count": {"$sum": 1},
+                "first": {"$min": {"post": "$_id", "pos": "$pos"}},
+            }},
+            {"$match": {"_id.term": {"$ne": ""}}},
+            {"$sort": {"first": 1}},
+        ]):
+            key = doc["_id"]["topic"]
+            if key in groups:
+                groups[key].keywords[doc["_id"]["term"]] = doc["count"]
+
+        for doc in self._aggregate([
+            match,
+            {"$match": {"ip_location": {"$nin": [None, "", 0, False]}}},
+            {"$group": {
+                "_id": {"topic": "$topic_key", "term": {"$toString": "$ip_location"}},
+                "count": {"$sum": 1},
+                "first": {"$min": "$_id"},
+            }},
+            {"$sort": {"first": 1}},
+        ]):
+            key = doc["_id"]["topic"]
+            if key in groups:
+                groups[key].geo[doc["_id"]["term"]] = doc["count"]
+
+        trend_rows = 0
+        for doc in self._aggregate(self._bucket_pipeline(match, event_time, "hour")):
+            key = doc["_id"]["topic"]
+            if key in groups:
+                groups[key].trend[doc["_id"]["bucket"]] = [
+                    int(doc["heat"]), doc["count"], float(doc["sent_sum"]), doc["sent_count"], doc.get("rep_post"),
+                ]
+                trend_rows += 1
+
+        for doc in self._aggregate(self._bucket_pipeline(match, event_time, "minute")):
+            key = doc["_id"]["topic"]
+            if key in groups:
+                groups[key].minutes[doc["_id"]["bucket"]] = [
+                    int(doc["heat"]), doc["count"], float(doc["sent_sum"]), doc["sent_count"],
+                ]
+
+        logger.info(f"Topic stats aggregated in Mongo: topics={len(groups)}, trend_buckets={trend_rows}, "
+                    f"{time.perf_counter() - t0:.2f}s")
+        return groups, total
+
+    @staticmethod
+    def _bucket_pipeline(match: dict, event_time: dict, unit: str) -> list:
+        """Per (topic, time bucket) heat / count / sentiment sums; rep_post is the last post_id in _id order."""
+        return [
+            match,
+            {"$sort": {"_id": 1}},
+            {"$group": {
+                "_id": {"topic": "$topic_key", "bucket": {"$dateTrunc": {"date": event_time, "unit": unit}}},
+                "heat": {"$sum": HEAT_EXPR},
+                "count": {"$sum": 1},
+                "sent_sum": {"$sum": "$sentiment_score"},
+                "sent_count": {"$sum": SENT_COUNT_EXPR},
+                "rep_post": {"$last": "$post_id"},
+            }},
+            {"$sort": {"_id.topic": 1, "_id.bucket": 1}},
+        ]
+
+    def backfill(self, query_filter: dict, published, task_value):
+        """Point posts at their new topic documents, one update per topic via topic_key."""
+        for topic_ref_id, topic_key in published:
+            self.posts.update_many(
+                {**query_filter, "topic_key": topic_key},
+                {"$set": {"topic_ref_id": topic_ref_id, "task_id": task_value}},
+            )
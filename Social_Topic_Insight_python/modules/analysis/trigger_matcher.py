@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import deque
+
+from core.logger import logger
+
+
+class TriggerMatcher:
+    """
+    Aho-Corasick 多模式匹配：自动机只构建一次，
+    之后每条文本只需扫描一遍即可找出全部命中的触发词，
+    耗时与词表大小无关。
+    """
+
+    def __init__(self, patterns=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.size = 0
+
+        for pattern in dict.fromkeys(p for p in patterns if p):
+            self._add(pattern)
+            self.size += 1
+        self._link()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] += (pattern,)
+
+    def _link(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+
+    def _scan(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield out[node]
+
+    def find_all(self, text: str) -> set:
+        """返回文本中出现过的全部触发词"""
+        hits = set()
+        if not text or not self.size: return hits
+        for matched in self._scan(text):
+            hits.update(matched)
+        return hits
+
+    def contains_any(self, text: str) -> bool:
+        """只要命中任意一个触发词就立即返回"""
+        if not text or not self.size: return False
+        for _ in self._scan(text):
+            return True
+        return False
+
+
+class TriggerLexicon:
+    """
+    事件词 / 负面死线词词表，支持从词表文件热加载。
+
+    文件格式 (UTF-8，# 开头为注释)：
+        [event]
+        污染
+        [negative]
+        死亡
+    文件不存在时使用传入的默认词表；文件修改后最多 reload_interval 秒内生效。
+    """
+
+    SECTIONS = ("event", "negative")
+
+    def __init__(self, path: str, default_event, default_negative, reload_interval: float = 30.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        self.event = TriggerMatcher(default_event)
+        self.negative = TriggerMatcher(default_negative)
+        self.reload()
+
+    def _read(self) -> dict:
+        lexicon = {name: [] for name in self.SECTIONS}
+        section = None
+        with open(self.path, "r", encoding="utf-8") as f:
+            for ln in f:
+                w = ln.strip()
+                if not w or w.startswith("#"): continue
+                if w.startswith("[") and w.endswith("]"):
+                    section = w[1:-1].strip().lower()
+                    continue
+                if section in lexicon:
+                    lexicon[section].append(w)
+        return lexicon
+
+    def reload(self) -> bool:
+        """词表文件有变化时重建自动机，返回是否发生了重建"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path) if self.path else None
+            except OSError:
+                mtime = None
+            if mtime is None or mtime == self._mtime:
+                return False
+
+            try:
+                lexicon = self._read()
+            except Exception as e:
+                logger.warning(f"Trigger lexicon load failed ({self.path}): {e}")
+                return False
+
+            # 先构建好新的自动机再整体替换，匹配线程不会看到半成品
+            self.event = TriggerMatcher(lexicon["event"])
+            self.negative = TriggerMatcher(lexicon["negative"])
+            self._mtime = mtime
+            logger.info(
+                f"Trigger lexicon loaded: event={self.event.size}, negative={self.negative.size} ({self.path})"
+            )
+            return True
+
+    def _maybe_reload(self):
+        if self.reload_interval <= 0: return
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+
+    def events(self, text: str) -> set:
+        self._maybe_reload()
+        return self.event.find_all(text)
+
+    def has_negative(self, text: str) -> bool:
+        self._maybe_reload()
+        return self.negative.contains_any(text)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from core.config import settings
 from core.database import db
 from models.topic import AnalyzedTopic
 from modules.api.utils import resp_200, resp_400
@@ -21,6 +22,11 @@ def map_sentiment_to_stars(score):
     # 限制范围并保留一位小数
     return round(max(1, min(5, stars)), 1)
 
+def active_burst_filter():
+    """正在突发的话题：is_burst 且突发所在小时仍在最近 BURST_WINDOW_HOURS 小时内 (两次聚类之间过期的也排除)"""
+    cutoff = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=settings.BURST_WINDOW_HOURS - 1)
+    return {"is_burst": True, "burst_state.bucket": {"$gte": cutoff}}
+
 @router.get("/hot-topics", response_model=dict)
 async def get_hot_topics():
     collection = db.get_collection("analyzed_topics")
@@ -38,13 +44,36 @@ async def get_hot_topics():
             "topic": t.name,
             "hotScore": t.total_heat,
             "sentiment": round(t.avg_sentiment, 2),
-            "isNew": t.is_burst,
+            # is_burst 现在表示热度突增 (见 /bursting)，"新" 标签按首次出现时间判断
+            "isNew": t.first_occur_time > datetime.now() - timedelta(days=1),
             "isExplosive": is_exp, # 【修复】前端需要这个字段显示"爆"
             "keywords": t.keywords
         })
     return resp_200(data=topics)
 
 
+@router.get("/bursting", response_model=dict)
+async def get_bursting_topics(limit: int = 20):
+    """当前正在突发的话题：当前小时热度相对 EWMA 基线的 z 分数超阈值，按突发分数降序"""
+    collection = db.get_collection("analyzed_topics")
+    cursor = collection.find(active_burst_filter()).sort("burst_score", -1).limit(max(1, min(limit, 100)))
+
+    topics = []
+    for doc in cursor:
+        state = doc.get("burst_state") or {}
+        topics.append({
+            "id": str(doc["_id"]),
+            "topic": doc.get("name", ""),
+            "burstScore": doc.get("burst_score", 0.0),
+            "hourHeat": state.get("level", 0),
+            "baselineHeat": round(state.get("mean", 0.0), 2),
+            "hourPosts": state.get("count", 0),
+            "hotScore": doc.get("total_heat", 0),
+            "keywords": doc.get("keywords", [])[:5]
+        })
+    return resp_200(data=topics)
+
+
 # 2. 新增仪表盘图表接口
 @router.get("/dashboard/charts", response_model=dict)
 async def get_dashboard_charts():
@@ -118,7 +147,8 @@ async def get_dashboard_stats():
     stats = [
         {"title": '总帖子数', "value": f"{total_posts:,}", "icon": 'Document', "type": 'primary', "trend": 12.5},
         {"title": '活跃话题', "value": str(total_topics), "icon": 'ChatLineSquare', "type": 'success', "trend": 8.2},
-        {"title": '突发热点', "value": str(topic_col.count_documents({"is_burst": True})), "icon": 'Lightning', "type": 'warning', "trend": -3.1},
+        # 突发热点 = 当前热度相对 EWMA 基线突增的话题，与 /bursting 口径一致
+        {"title": '突发热点', "value": str(topic_col.count_documents(active_burst_filter())), "icon": 'Lightning', "type": 'warning', "trend": -3.1},
         {"title": '负面舆情', "value": f"{neg_rate}%", "icon": 'Warning', "type": 'danger', "trend": 2.1}
     ]
     return resp_200(data=stats)
@@ -136,32 +166,48 @@ def map_sentiment_to_stars(score):
     else:
         return 1
 
+# 趋势粒度 -> 横轴时间格式
+TREND_DATE_FORMATS = {"minute": "%Y-%m-%d %H:%M", "hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+
 @router.get("/topic/{topic_id}", response_model=dict)
-async def get_topic_detail(topic_id: str):
-    """获取话题深度分析详情 (优化版：使用真实帖子关键词聚合词云)"""
+async def get_topic_detail(topic_id: str, granularity: str = "hour"):
+    """获取话题深度分析详情 (优化版：使用真实帖子关键词聚合词云)；granularity 为趋势粒度 minute / hour / day"""
     if not ObjectId.is_valid(topic_id):
         return resp_400(msg="无效的话题ID")
+    if granularity not in TREND_DATE_FORMATS:
+        return resp_400(msg="无效的趋势粒度")
 
     t_oid = ObjectId(topic_id)
     topic_col = db.get_collection("analyzed_topics")
     post_col = db.get_collection("social_posts")
     trend_col = db.get_collection("topic_trends")
+    rollup_col = db.get_collection("topic_trend_rollups")
 
     topic_doc = topic_col.find_one({"_id": t_oid})
     if not topic_doc:
         return resp_400(msg="话题不存在")
     
     # === 1. 查询预计算的趋势数据 ===
-    trend_cursor = trend_col.find({"topic_ref_id": t_oid}).sort("time_bucket", 1)
-    trends = list(trend_cursor)
+    # 优先读多粒度汇总 (按 bucket_start 走复合索引)，长时间跨度用 day 粒度只需少量文档
+    rollup_cursor = rollup_col.find(
+        {"topic_ref_id": t_oid, "granularity": granularity},
+        {"bucket_start": 1, "heat_value": 1}
+    ).sort("bucket_start", 1)
+    date_format = TREND_DATE_FORMATS[granularity]
     
     # 构建图表数据
     dates = []
     values = []
-    for t in trends:
-        dates.append(t["time_bucket"]) 
+    for t in rollup_cursor:
+        dates.append(t["bucket_start"].strftime(date_format))
         values.append(t["heat_value"])
     
+    # 旧数据没有汇总时回退到小时级 topic_trends
+    if not dates and granularity == "hour":
+        for t in trend_col.find({"topic_ref_id": t_oid}).sort("time_bucket", 1):
+            dates.append(t["time_bucket"]) 
+            values.append(t["heat_value"])
+    
     # === 2. 查 Post 表获取情感分布、关键词和最新帖子 (Top 100) ===
     posts_cursor = post_col.find(
         {"topic_ref_id": t_oid},
@@ -330,7 +376,9 @@ async def get_topic_graph():
             "y": doc.get("y", 0.0),
             "value": doc.get("total_heat", 0),
             "sentiment": doc.get("avg_sentiment", 0),
-            "keywords": doc.get("keywords", [])[:5]
+            "keywords": doc.get("keywords", [])[:5],
+            # 图谱边：[{"topic_id", "similarity"}]
+            "related_topics": doc.get("related_topics", [])
         })
                 
     return resp_200(data=data)
\ No newline at end of file
@@ -3,6 +3,7 @@ from datetime import datetime
 from pymongo.errors import DuplicateKeyError
 from core.database import db
 from core.logger import logger
+from modules.analysis.lease import PostLeaseQueue
 
 class BaseCrawler(ABC):
     def __init__(self):
@@ -44,6 +45,7 @@ class BaseCrawler(ABC):
             # 遇到重复 post_id 时，不丢弃本次任务上下文：
             # 1) 回写最新 crawl_time/task_id
             # 2) 重置 process_status 触发本轮分析，避免“任务完成但数据不更新”
+            # 3) 清掉分析租约：正在分析旧内容的 worker 写回时因租约不匹配而跳过
             self.collection.update_one(
                 {"post_id": payload.get("post_id")},
                 {"$set": {
@@ -57,7 +59,7 @@ class BaseCrawler(ABC):
                     "url": payload.get("url"),
                     "task_id": payload.get("task_id"),
                     "process_status": 0
-                }}
+                }, "$unset": PostLeaseQueue.LEASE_FIELDS}
             )
             logger.info(f"[Crawler] Updated duplicate {payload['platform']} - {payload['post_id']}")
         except Exception as e:
@@ -0,0 +1,99 @@
+"""
+Embedding 聚类基准：用合成的话题混合向量 (每个话题一个随机中心 + 噪声) 模拟帖子向量，
+分块流式送入 StreamingClusterer，统计吞吐、话题数与聚类质量 (purity / 每个真实话题被拆成的簇数)。
+
+用法：
+    python scripts/cluster_bench.py                          # 10k / 100k / 1M
+    python scripts/cluster_bench.py --sizes 10000 --dim 768 --topics 300 --refine 1
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analysis.clustering import peak_rss_mb
+from modules.analysis.embedding_cluster import StreamingClusterer, normalize_rows
+from modules.analysis.layout import TopicLayout
+
+
+def synthetic_blocks(n: int, centers: np.ndarray, noise: float, block: int, seed: int):
+    """按块生成 (真实话题, 向量)，同一 seed 重复调用得到相同数据 (供重分配轮使用)"""
+    rng = np.random.default_rng(seed)
+    dim = centers.shape[1]
+    for start in range(0, n, block):
+        size = min(block, n - start)
+        truth = rng.integers(len(centers), size=size)
+        # 话题大小不均：一半的帖子集中在前 10% 的话题上
+        hot = rng.random(size) < 0.5
+        truth[hot] = rng.integers(max(1, len(centers) // 10), size=int(hot.sum()))
+        X = centers[truth] + rng.standard_normal((size, dim), dtype=np.float32) * (noise / np.sqrt(dim))
+        yield truth, normalize_rows(X.astype(np.float32))
+
+
+def quality(truth: np.ndarray, labels: np.ndarray):
+    pairs = truth.astype(np.int64) * (labels.max() + 1) + labels
+    uniq, counts = np.unique(pairs, return_counts=True)
+    t_of, l_of = uniq // (labels.max() + 1), uniq % (labels.max() + 1)
+    # purity: 每个簇里占多数的真实话题的比例
+    best_per_cluster = np.zeros(labels.max() + 1, np.int64)
+    np.maximum.at(best_per_cluster, l_of, counts)
+    purity = best_per_cluster.sum() / len(labels)
+    # 真实话题平均被拆成多少个簇 (只计占该话题 >= 5% 的簇)
+    topic_sizes = np.bincount(truth)
+    significant = counts >= 0.05 * topic_sizes[t_of]
+    splits = np.bincount(t_of[significant]).astype(float)
+    return purity, splits[splits > 0].mean()
+
+
+def run(n: int, args, centers: np.ndarray):
+    clusterer = StreamingClusterer(threshold=args.threshold, max_clusters=args.max_topics)
+    t0 = time.perf_counter()
+    truth_all, labels_all = [], []
+    for truth, X in synthetic_blocks(n, centers, args.noise, args.block, args.seed):
+        labels_all.append(clusterer.partial_fit(X))
+        truth_all.append(truth)
+    remap = clusterer.merge()
+    labels_all = [remap[lbl] for lbl in labels_all]
+    t_pass = time.perf_counter() - t0
+
+    for _ in range(args.refine):
+        clusterer.refine_begin()
+        labels_all = [clusterer.refine_partial(X) for _, X in synthetic_blocks(n, centers, args.noise, args.block, args.seed)]
+        remap = clusterer.refine_end()
+        labels_all = [remap[lbl] for lbl in labels_all]
+    elapsed = time.perf_counter() - t0
+
+    t_layout = time.perf_counter()
+    TopicLayout("embedding").fit(clusterer.centroids)
+    t_layout = time.perf_counter() - t_layout
+
+    purity, splits = quality(np.concatenate(truth_all), np.concatenate(labels_all))
+    print(f"{n:>9,} posts | pass {t_pass:7.2f}s | total {elapsed:7.2f}s | {n / elapsed:>10,.0f} posts/s | "
+          f"clusters {clusterer.n_clusters:>5} | purity {purity:.3f} | splits/topic {splits:.2f} | "
+          f"layout {t_layout:.3f}s | peak_rss_mb {peak_rss_mb()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embedding clustering benchmark on synthetic topic mixtures")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=300, help="合成数据中的真实话题数")
+    parser.add_argument("--noise", type=float, default=0.6, help="噪声向量范数，0.6 时与话题中心的余弦约 0.86")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--max-topics", type=int, default=2000)
+    parser.add_argument("--refine", type=int, default=1)
+    parser.add_argument("--block", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    centers = normalize_rows(np.random.default_rng(args.seed).standard_normal((args.topics, args.dim)).astype(np.float32))
+    for n in args.sizes:
+        run(n, args, centers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+候选词裁剪效果报告：从 social_posts 抽取已清洗的帖子，
+对比裁剪 / 未裁剪两条路径的候选词数量与关键词重合度。
+
+用法：
+    python scripts/keyword_pruning_report.py --limit 500 --max-candidates 64
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import settings
+from core.database import db
+from modules.analysis.nlp_base import NLPProcessor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keyword candidate pruning report")
+    parser.add_argument("--limit", type=int, default=500, help="抽样帖子数")
+    parser.add_argument("--max-candidates", type=int, default=settings.KEYWORD_MAX_CANDIDATES)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    settings.KEYWORD_MAX_CANDIDATES = args.max_candidates
+
+    db.connect()
+    cursor = db.get_collection("social_posts").find(
+        {"clean_content": {"$nin": [None, ""]}}, {"clean_content": 1}
+    ).sort("_id", -1).limit(args.limit)
+    texts = [doc["clean_content"] for doc in cursor]
+    print(f">>> 抽样 {len(texts)} 条帖子，候选词上限 {args.max_candidates}")
+
+    report = NLPProcessor().pruning_report(texts, top_k=args.top_k)
+    for k, v in report.items():
+        print(f"{k:>24}: {v}")
+
+
+if __name__ == "__main__":
+    main()
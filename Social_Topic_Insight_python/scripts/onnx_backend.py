@@ -0,0 +1,48 @@
+"""
+ONNX 推理后端工具：
+
+    # 导出向量模型与情感模型 (默认同时生成动态 int8 量化版本)
+    python scripts/onnx_backend.py export
+    # 与 PyTorch 输出做一致性校验
+    python scripts/onnx_backend.py parity --limit 200 [--fp32]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import db
+from modules.analysis.onnx_backend import export_models, parity_check
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ONNX backend export / parity check")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="导出 ONNX 模型")
+    p_export.add_argument("--no-quantize", action="store_true", help="不生成 int8 量化模型")
+
+    p_parity = sub.add_parser("parity", help="与 PyTorch 输出对比")
+    p_parity.add_argument("--limit", type=int, default=200, help="抽样帖子数")
+    p_parity.add_argument("--fp32", action="store_true", help="校验未量化的模型")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_models(quantize=not args.no_quantize)
+        return
+
+    db.connect()
+    cursor = db.get_collection("social_posts").find(
+        {"clean_content": {"$nin": [None, ""]}}, {"clean_content": 1}
+    ).sort("_id", -1).limit(args.limit)
+    texts = [doc["clean_content"] for doc in cursor]
+
+    report = parity_check(texts, quantized=not args.fp32)
+    for k, v in report.items():
+        print(f"{k:>26}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+TextCleaner 校验与基准：
+1. 用 scripts/data/text_cleaner_golden.jsonl (由改写前的 TextCleaner 生成的输入 / 输出对)
+   校验当前实现的输出逐条一致；
+2. 测量 clean / clean_many 的吞吐 (MB/s，按 UTF-8 字节计)。
+
+用法：
+    python scripts/text_cleaner_bench.py                 # 只用黄金语料
+    python scripts/text_cleaner_bench.py --from-db 5000  # 另外抽取库中原始帖子测吞吐
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.analysis.cleaning import TextCleaner
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "text_cleaner_golden.jsonl")
+
+
+def load_golden(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_golden(cases) -> int:
+    mismatches = 0
+    for case in cases:
+        got = TextCleaner.clean(case["input"])
+        if got != case["output"]:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"  [DIFF] input={case['input']!r}\n         expected={case['output']!r}\n         got={got!r}")
+    batch = list(TextCleaner.clean_many(c["input"] for c in cases))
+    mismatches += sum(1 for got, c in zip(batch, cases) if got != c["output"])
+    return mismatches
+
+
+def bench(texts, repeat: int):
+    size_mb = sum(len(t.encode("utf-8")) for t in texts) / 1024 / 1024
+    for name, fn in (
+        ("clean", lambda: [TextCleaner.clean(t) for t in texts]),
+        ("clean_many", lambda: list(TextCleaner.clean_many(texts))),
+    ):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:>12}: {len(texts)} texts, {size_mb:.2f} MB in {best:.3f}s -> "
+              f"{size_mb / best:.1f} MB/s, {len(texts) / best:,.0f} texts/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TextCleaner golden check and throughput benchmark")
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--from-db", type=int, default=0, help="额外从 social_posts 抽取的原始帖子数")
+    parser.add_argument("--scale", type=int, default=50, help="黄金语料重复次数 (放大基准数据量)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = load_golden(args.golden)
+    mismatches = check_golden(cases)
+    print(f">>> 黄金语料 {len(cases)} 条，不一致 {mismatches} 条")
+
+    texts = [c["input"] for c in cases] * args.scale
+    if args.from_db:
+        from core.database import db
+        db.connect()
+        cursor = db.get_collection("social_posts").find({}, {"content": 1}).limit(args.from_db)
+        texts = [doc.get("content") or "" for doc in cursor]
+        print(f">>> 从 social_posts 抽取 {len(texts)} 条原始帖子")
+    bench(texts, args.repeat)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
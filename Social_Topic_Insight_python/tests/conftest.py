@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# 将项目根目录加入 Python 搜索路径 (与 test.py 相同)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo():
+    """内存版 MongoDB (mongomock)，替换 core.database 的全局连接。"""
+    mongomock = pytest.importorskip("mongomock")
+    from core.database import MongoDB
+
+    client, database = MongoDB.client, MongoDB.db
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["test"]
+    yield MongoDB.db
+    MongoDB.client, MongoDB.db = client, database
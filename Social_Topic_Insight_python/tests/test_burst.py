@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from modules.analysis.burst import bucket_of, replay
+from modules.analysis.clustering import ClusterEngine
+from modules.analysis.incremental import IncrementalClusterer
+
+HOURS = 12
+
+
+def _series(heat: int, count: int) -> dict:
+    """A flat hourly series ending in the current hour."""
+    now = bucket_of(datetime.now())
+    return {now - timedelta(hours=h): [heat, count] for h in range(HOURS)}
+
+
+def _insert_topic(db, topic_id, series, centroid):
+    posts = sum(count for _, count in series.values())
+    heat = sum(h for h, _ in series.values())
+    db["topic_centroids"].insert_one({
+        "_id": topic_id, "centroid_sum": (centroid * posts).tolist(), "vec_count": posts,
+        "post_count": posts, "heat": heat, "sent_sum": 0.0, "sent_count": 0,
+        "keywords": [], "geo": [], "min_time": min(series), "max_time": max(series), "rep_docs": [],
+    })
+    db["analyzed_topics"].insert_one({"_id": topic_id, "post_count": posts, "total_heat": heat,
+                                      **replay(series).topic_fields(datetime.now())})
+    db["topic_trends"].insert_many([
+        {"topic_ref_id": topic_id, "time_bucket": bucket.strftime("%Y-%m-%d %H:00"), "heat_value": h,
+         "post_count": count, "sent_sum": 0.0, "sent_count": 0}
+        for bucket, (h, count) in series.items()
+    ])
+
+
+def test_merge_of_steady_topics_is_not_a_burst(mongo):
+    """Two flat topics merged by compaction stay flat: the survivor's detector is replayed, not advanced."""
+    centroid = np.ones(8, np.float32) / np.sqrt(8)
+    survivor, absorbed = ObjectId(), ObjectId()
+    _insert_topic(mongo, survivor, _series(300, 6), centroid)
+    _insert_topic(mongo, absorbed, _series(200, 4), centroid)
+
+    clusterer = IncrementalClusterer(ClusterEngine())
+    clusterer._load_state()
+    clusterer.compact()
+
+    assert mongo["analyzed_topics"].count_documents({}) == 1
+    topic = mongo["analyzed_topics"].find_one({"_id": survivor})
+    expected = replay(_series(500, 10))
+    assert topic["is_burst"] is False
+    assert topic["burst_score"] == expected.score()
+    assert topic["burst_state"]["level"] == 500
+    assert abs(topic["burst_state"]["mean"] - expected.mean) < 1e-6
@@ -1,14 +1,20 @@
+import argparse
 import json
 import time
 
+_IMPORT_START = time.perf_counter()
+
 import pika
 from bson import ObjectId
 
 from core.config import settings
 from core.database import db
 from core.logger import logger
+from modules.analysis.nlp_base import NLPProcessor
 from modules.crawler.engine import CrawlerEngine
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
 
 def build_connection() -> pika.BlockingConnection:
     logger.info(
@@ -122,15 +128,37 @@ def handle_task(
         channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
 
-def main() -> None:
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Social Topic Insight MQ worker")
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Preload NLP models in a background thread while connecting to RabbitMQ",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logger.info("[Startup] imports took %.2fs", _IMPORT_SECONDS)
+
+    if args.warmup:
+        # Models load in the background; a task arriving earlier simply waits on the loader.
+        NLPProcessor().warmup(background=True)
+        logger.info("[Startup] NLP warmup started in background")
+
+    phase_start = time.perf_counter()
     db.connect()
+    logger.info("[Startup] MongoDB connect took %.2fs", time.perf_counter() - phase_start)
 
     while True:
         connection = None
         try:
+            phase_start = time.perf_counter()
             connection = build_connection()
             channel = connection.channel()
             ensure_topology(channel)
+            logger.info("[Startup] RabbitMQ connect took %.2fs", time.perf_counter() - phase_start)
 
             channel.basic_qos(prefetch_count=1)
             channel.basic_consume(queue=settings.TASK_QUEUE, on_message_callback=handle_task)
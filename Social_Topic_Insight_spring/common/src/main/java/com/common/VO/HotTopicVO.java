@@ -19,7 +19,7 @@ public class HotTopicVO {
     private Double sentiment;
     /** 是否爆款。 */
     private Boolean isExplosive;
-    /** 是否新话题。 */
+    /** 是否新话题（首次出现在 24 小时内）。 */
     private Boolean isNew;
     /** 话题关键词列表。 */
     private List<String> keywords;
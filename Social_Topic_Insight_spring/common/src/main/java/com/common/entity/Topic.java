@@ -9,6 +9,7 @@ import org.springframework.data.mongodb.core.mapping.Field;
 import org.springframework.data.mongodb.core.mapping.FieldType;
 import org.springframework.data.mongodb.core.mapping.MongoId;
 
+import java.util.Date;
 import java.util.List;
 
 /**
@@ -43,7 +44,11 @@ public class Topic {
     @Field("avg_sentiment")
     private Double avgSentiment;
 
-    /** 是否为突发话题。 */
+    /** 首次出现时间。 */
+    @Field("first_occur_time")
+    private Date firstOccurTime;
+
+    /** 是否正在突发（当前小时热度相对 EWMA 基线显著偏高，不表示新话题）。 */
     @Field("is_burst")
     private Boolean isBurst;
 
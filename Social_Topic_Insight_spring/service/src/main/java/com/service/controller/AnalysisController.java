@@ -20,6 +20,7 @@ import org.springframework.web.bind.annotation.RequestMapping;
 import org.springframework.web.bind.annotation.RestController;
 
 import java.time.Duration;
+import java.time.Instant;
 import java.time.LocalDateTime;
 import java.time.ZoneId;
 import java.time.format.DateTimeFormatter;
@@ -172,6 +173,7 @@ public class AnalysisController {
 
         long totalPosts = mongoTemplate.getCollection("social_posts").countDocuments(postFilter);
         long totalTopics = mongoTemplate.getCollection("analyzed_topics").countDocuments(topicFilter);
+        // 突发热点 = 当前热度相对 EWMA 基线突增的话题 (is_burst)
         long burstTopics = mongoTemplate.getCollection("analyzed_topics")
                 .countDocuments(new Document(topicFilter).append("is_burst", true));
         long negativePosts = mongoTemplate.getCollection("social_posts")
@@ -465,7 +467,8 @@ public class AnalysisController {
             row.put("topic", defaultTopicName(doc));
             row.put("hotScore", toInt(doc.get("total_heat")));
             row.put("sentiment", round(toDouble(doc.get("avg_sentiment")), 2));
-            row.put("isNew", toBool(doc.get("is_burst")));
+            // is_burst 表示热度突增；“新”按首次出现时间是否在 24 小时内判断
+            row.put("isNew", isNewTopic(toDate(doc.get("first_occur_time"))));
             row.put("isExplosive", toInt(doc.get("total_heat")) > 4000);
             row.put("keywords", toStringList(doc.get("keywords")));
             topics.add(row);
@@ -628,6 +631,11 @@ public class AnalysisController {
         return null;
     }
 
+    private boolean isNewTopic(Date firstOccurTime) {
+        return firstOccurTime != null
+                && firstOccurTime.toInstant().isAfter(Instant.now().minus(Duration.ofDays(1)));
+    }
+
     private String formatDateTime(Date date) {
         if (date == null) {
             return "-";
@@ -663,16 +671,6 @@ public class AnalysisController {
         return 0.0;
     }
 
-    private boolean toBool(Object value) {
-        if (value instanceof Boolean b) {
-            return b;
-        }
-        if (value instanceof String s) {
-            return Boolean.parseBoolean(s);
-        }
-        return false;
-    }
-
     private double round(double val, int digits) {
         double scale = Math.pow(10, digits);
         return Math.round(val * scale) / scale;
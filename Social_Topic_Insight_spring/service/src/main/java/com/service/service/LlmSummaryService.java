@@ -29,6 +29,7 @@ import org.springframework.util.StringUtils;
 import org.springframework.web.client.RestClient;
 
 import java.time.Duration;
+import java.time.Instant;
 import java.util.ArrayList;
 import java.util.Collections;
 import java.util.List;
@@ -436,7 +437,9 @@ public class LlmSummaryService {
         vo.setTopic(StringUtils.hasText(topic.getName()) ? topic.getName() : "Untitled Topic");
         vo.setHotScore(topic.getTotalHeat() == null ? 0 : topic.getTotalHeat());
         vo.setSentiment(topic.getAvgSentiment() == null ? 0D : topic.getAvgSentiment());
-        vo.setIsNew(Boolean.TRUE.equals(topic.getIsBurst()));
+        // is_burst 表示热度突增；“新”按首次出现时间是否在 24 小时内判断
+        vo.setIsNew(topic.getFirstOccurTime() != null
+                && topic.getFirstOccurTime().toInstant().isAfter(Instant.now().minus(Duration.ofDays(1))));
         boolean explosive = (topic.getTotalHeat() != null && topic.getTotalHeat() > 4000)
                 || Boolean.TRUE.equals(topic.getIsBurst());
         vo.setIsExplosive(explosive);